@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Fonction d'embedding partagée pour BurkinaHeritage
+
+Une seule instance ONNX all-MiniLM-L6-v2 pour tout le process :
+chaque DefaultEmbeddingFunction() reconstruit modèle + tokenizer
+(~200 ms d'installation évitable), et la session par défaut monopolise
+tous les cœurs en intra-op. Ici la session est unique et épinglée à
+1 thread, pour que les requêtes concurrentes se répartissent sur les
+cœurs au lieu de se les disputer.
+"""
+
+import os
+import threading
+
+# Instance partagée, créée paresseusement au premier appel
+_EMBEDDER = None
+_EMBEDDER_LOCK = threading.Lock()
+
+
+def get_embedder():
+    """Retourne la fonction d'embedding ONNX partagée du process"""
+    global _EMBEDDER
+    if _EMBEDDER is None:
+        # Verrou + double vérification : les threads FastAPI concurrents
+        # ne doivent instancier (et charger le modèle) qu'une seule fois
+        with _EMBEDDER_LOCK:
+            if _EMBEDDER is None:
+                # Limiter le parallélisme intra-op AVANT de charger onnxruntime
+                # (la session lit ces variables à sa création)
+                os.environ.setdefault("OMP_NUM_THREADS", "1")
+                os.environ.setdefault("ORT_INTRA_OP_NUM_THREADS", "1")
+                from chromadb.utils import embedding_functions
+                embedder = embedding_functions.DefaultEmbeddingFunction()
+                _pin_session_threads(embedder)
+                _EMBEDDER = embedder
+    return _EMBEDDER
+
+
+def _pin_session_threads(embedder):
+    """Épingle la session ONNX à 1 thread intra/inter-op (best effort)"""
+    try:
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        # ONNXMiniLM_L6_V2 construit sa session paresseusement ; on lui
+        # fournit nos options si l'attribut existe dans cette version
+        model = getattr(embedder, "_model", embedder)
+        if hasattr(model, "_session_options"):
+            model._session_options = options
+    except Exception:
+        pass
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Cache persistant d'embeddings pour BurkinaHeritage
+
+La reconstruction de la base recalculait les embeddings de tout le
+corpus même quand seuls quelques documents scrapés avaient changé.
+Chaque vecteur est mis en cache sous le hash SHA-256 de son contenu :
+seuls les documents nouveaux ou modifiés repassent par l'encodeur
+(le delta typique après un scraping est <5 % du corpus).
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+
+def _content_key(text: str) -> str:
+    """Clé de cache d'un document : SHA-256 de son contenu"""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _load_cache(cache_path: Path) -> dict:
+    """Charge le cache existant {clé: vecteur} (dict vide si absent)"""
+    if not cache_path.exists():
+        return {}
+    try:
+        data = np.load(cache_path, mmap_mode='r', allow_pickle=False)
+        keys = json.loads(str(data["keys"]))
+        matrix = data["embeddings"]
+        return {key: matrix[i] for i, key in enumerate(keys)}
+    except Exception as e:
+        print(f"⚠️  Cache d'embeddings illisible, ignoré: {e}")
+        return {}
+
+
+def _save_cache(cache: dict, cache_path: Path):
+    """Persiste le cache {clé: vecteur} (best effort)"""
+    try:
+        keys = list(cache.keys())
+        matrix = np.vstack([np.asarray(cache[key], dtype=np.float32) for key in keys])
+        np.savez(cache_path, keys=np.array(json.dumps(keys)), embeddings=matrix)
+    except Exception as e:
+        print(f"⚠️  Cache d'embeddings non sauvegardé: {e}")
+
+
+def get_or_compute(texts: List[str], embedding_function, cache_path: Path) -> np.ndarray:
+    """
+    Retourne les embeddings de texts en ne recalculant que les absents
+    du cache.
+
+    Args:
+        texts (List[str]): Contenus à encoder
+        embedding_function: Fonction d'embedding (interface ChromaDB)
+        cache_path (Path): Fichier .npz du cache persistant
+
+    Returns:
+        np.ndarray: Matrice float32 (len(texts), dim), dans l'ordre de texts
+    """
+    keys = [_content_key(text) for text in texts]
+    cache = _load_cache(cache_path)
+
+    miss_indices = [i for i, key in enumerate(keys) if key not in cache]
+    hits = len(texts) - len(miss_indices)
+    print(f"⚡ Embeddings: {hits} en cache, {len(miss_indices)} à calculer")
+
+    if miss_indices:
+        # Un seul appel batché pour tous les absents
+        new_vectors = np.asarray(
+            embedding_function([texts[i] for i in miss_indices]),
+            dtype=np.float32
+        )
+        for j, i in enumerate(miss_indices):
+            cache[keys[i]] = new_vectors[j]
+        _save_cache(cache, cache_path)
+
+    return np.vstack([np.asarray(cache[key], dtype=np.float32) for key in keys])
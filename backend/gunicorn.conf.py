@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Configuration Gunicorn pour BurkinaHeritage
+
+Déploiement multi-workers : un seul process uvicorn plafonne le débit
+à un cœur CPU (GIL + parties synchrones du RAG). Avec 2*CPU+1 workers
+UvicornWorker, le débit (QPS) monte quasi linéairement avec les cœurs.
+
+Usage: gunicorn main:app -c gunicorn.conf.py
+"""
+
+import os
+
+# Adresse d'écoute (PORT fourni par Render/Railway en production)
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Dimensionnement classique : 2*CPU+1 workers
+workers = 2 * (os.cpu_count() or 1) + 1
+
+# Worker ASGI uvicorn (l'app FastAPI reste asynchrone)
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Le tour RAG complet (embedding + ChromaDB + LLM) peut être long
+timeout = 120
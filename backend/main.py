@@ -10,6 +10,7 @@ React de poser des questions et recevoir des réponses contextualisées.
 
 Endpoints principaux:
     - POST /api/chat : Poser une question au système RAG
+    - POST /api/chat/stream : Même chose en SSE (réponse en fragments)
     - GET /api/health : Vérifier l'état de santé du serveur
     - GET /api/stats : Obtenir les statistiques du corpus
     - DELETE /api/clear : Effacer l'historique (compatibilité frontend)
@@ -26,16 +27,37 @@ Date : Novembre 2025
 Licence : Open Source
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
+import msgspec
 from typing import List, Dict, Optional
+from collections import Counter
+import hashlib
+import time
 import uvicorn
 from datetime import datetime
 import asyncio
 
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def utc_timestamp() -> str:
+    """Horodatage ISO 8601 UTC (précision milliseconde)"""
+    return datetime.utcnow().isoformat(timespec="milliseconds") + "Z"
+
+# Cache TTL des réponses /api/chat (évite embedding + recherche + LLM
+# pour les questions répétées, fréquentes en démo)
+try:
+    from cachetools import TTLCache
+    chat_cache = TTLCache(maxsize=512, ttl=600)
+except ImportError:
+    chat_cache = None
+
 # Import du système RAG
-from rag_simple import BurkinaHeritageRAGSimple
+from rag_simple import BurkinaHeritageRAGSimple, prior_history
 
 # Créer l'application FastAPI avec métadonnées
 app = FastAPI(
@@ -43,7 +65,9 @@ app = FastAPI(
     description="Assistant IA Culturel 100% Open Source sur le Burkina Faso - Hackathon 2025",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # orjson sérialise les réponses en C (évite jsonable_encoder + json stdlib)
+    default_response_class=ORJSONResponse
 )
 
 # Configuration CORS (Cross-Origin Resource Sharing)
@@ -51,12 +75,16 @@ app = FastAPI(
 import os
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 
+# Pas de credentials (l'API n'utilise ni cookies ni auth), méthodes et
+# headers explicites, et max_age pour que le navigateur cache le preflight
+# OPTIONS une journée au lieu de le rejouer à chaque requête
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
-    allow_credentials=True,
-    allow_methods=["*"],  # Autoriser GET, POST, DELETE, etc.
-    allow_headers=["*"],  # Autoriser tous les headers
+    allow_credentials=False,
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["content-type"],
+    max_age=86400,
 )
 
 # Initialiser le système RAG au démarrage
@@ -67,18 +95,40 @@ print("=" * 70 + "\n")
 rag_system = None
 rag_loading = False
 
+# Statistiques du corpus précalculées au démarrage : le corpus est immuable
+# après l'initialisation, inutile de le re-scanner à chaque appel /api/stats
+corpus_stats = None
+
+def _precompute_corpus_stats():
+    """Calcule une fois les statistiques servies par /api/stats."""
+    global corpus_stats
+
+    categories = Counter(rag_system.categories)
+    sources = sorted({
+        source.split(" - ")[0]
+        for source in rag_system.sources
+        if source
+    })
+
+    corpus_stats = {
+        "total_documents": len(rag_system.contents),
+        "categories": dict(categories),
+        "sources": sources
+    }
+
 def init_rag_sync():
     """Initialise le RAG de manière synchrone."""
     global rag_system, rag_loading
-    
+
     if rag_system is not None:
         return
-    
+
     rag_loading = True
-    
+
     try:
         print("🔄 Initialisation du RAG au démarrage...")
         rag_system = BurkinaHeritageRAGSimple()
+        _precompute_corpus_stats()
         print("\n✅ RAG initialisé avec succès!\n")
     except Exception as e:
         print(f"\n❌ Erreur lors de l'initialisation du RAG: {e}\n")
@@ -94,33 +144,30 @@ init_rag_sync()
 
 # Modèles Pydantic pour la validation des données
 
-class ChatRequest(BaseModel):
+class ChatRequest(msgspec.Struct):
     """
     Modèle de requête pour l'endpoint /api/chat.
-    
+
+    msgspec.Struct plutôt que Pydantic : le décodage JSON -> struct typée
+    se fait en une passe C, nettement plus rapide sur ce endpoint chaud.
+
     Attributes:
         question (str): Question posée par l'utilisateur (requis)
         use_llm (bool): Activer le LLM Hugging Face (défaut: False)
         n_results (int): Nombre de documents à rechercher (défaut: 5)
         conversation_history (List[Dict]): Historique de la conversation
+        session_id (str): Identifiant de conversation — permet au RAG de
+            n'envoyer à Gemini que le tour delta (session de chat)
     """
     question: str
-    use_llm: Optional[bool] = False  # Par défaut, utiliser le fallback
-    n_results: Optional[int] = 5
-    conversation_history: Optional[List[Dict[str, str]]] = []
-    
-    class Config:
-        schema_extra = {
-            "example": {
-                "question": "Qu'est-ce que le balafon ?",
-                "use_llm": False,
-                "n_results": 5,
-                "conversation_history": [
-                    {"role": "user", "content": "Bonjour"},
-                    {"role": "assistant", "content": "Bonjour ! Comment puis-je vous aider ?"}
-                ]
-            }
-        }
+    use_llm: bool = False  # Par défaut, utiliser le fallback
+    n_results: int = 5
+    conversation_history: List[Dict[str, str]] = msgspec.field(default_factory=list)
+    session_id: Optional[str] = None
+
+
+# Décodeur précréé (réutilisé à chaque requête)
+_chat_request_decoder = msgspec.json.Decoder(ChatRequest)
 
 
 class Source(BaseModel):
@@ -181,6 +228,18 @@ class StatsResponse(BaseModel):
     sources: List[str]
 
 
+@app.on_event("startup")
+async def setup_executor():
+    """
+    Installe un pool de threads borné pour les appels RAG déportés.
+
+    Un pool explicite (8 threads max) évite que trop d'appels RAG
+    concurrents saturent la mémoire ou l'API Gemini.
+    """
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=8))
+
+
 # Routes de l'API
 
 @app.get("/", tags=["Root"])
@@ -208,53 +267,47 @@ async def health_check():
             "message": "Système RAG en cours d'initialisation...",
             "rag_initialized": False,
             "total_documents": 0,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": utc_timestamp()
         }
     
     return {
         "status": "healthy" if rag_system else "error",
         "message": "Système RAG opérationnel" if rag_system else "RAG non initialisé",
         "rag_initialized": rag_system is not None,
-        "total_documents": len(rag_system.corpus) if rag_system else 0,
-        "timestamp": datetime.now().isoformat()
+        "total_documents": len(rag_system.contents) if rag_system else 0,
+        "timestamp": utc_timestamp()
     }
 
 
 @app.get("/api/stats", response_model=StatsResponse, tags=["System"])
 async def get_stats():
     """Retourne les statistiques du système"""
-    if not rag_system:
+    if not rag_system or corpus_stats is None:
         raise HTTPException(status_code=503, detail="Système RAG non initialisé")
-    
-    # Compter les catégories
-    categories = {}
-    sources_set = set()
-    
-    for doc in rag_system.corpus:
-        cat = doc.get("category", "unknown")
-        categories[cat] = categories.get(cat, 0) + 1
-        
-        source = doc.get("source", "").split(" - ")[0]
-        if source:
-            sources_set.add(source)
-    
-    return {
-        "total_documents": len(rag_system.corpus),
-        "categories": categories,
-        "sources": sorted(list(sources_set))
-    }
 
+    # Statistiques précalculées au démarrage (O(1) par requête)
+    return corpus_stats
 
-@app.post("/api/chat", response_model=ChatResponse, tags=["Chat"])
-async def chat(request: ChatRequest):
+
+# Pas de response_model ici : la revalidation Pydantic de la réponse
+# doublerait le travail déjà fait par rag_system.ask (hot path)
+@app.post("/api/chat", tags=["Chat"])
+async def chat(raw_request: Request):
     """
     Répond à une question sur la culture burkinabè
-    
+
     - **question**: La question à poser
     - **use_llm**: Utiliser le LLM Hugging Face (nécessite token)
     - **n_results**: Nombre de documents à rechercher
     - **conversation_history**: Historique de la conversation
+    - **session_id**: Identifiant de conversation (tours delta vers Gemini)
     """
+    # Décodage msgspec (une passe C, pas de validation champ par champ)
+    try:
+        request = _chat_request_decoder.decode(await raw_request.body())
+    except (msgspec.ValidationError, msgspec.DecodeError) as e:
+        raise HTTPException(status_code=422, detail=f"Requête invalide: {e}")
+
     if rag_loading:
         raise HTTPException(
             status_code=503, 
@@ -270,34 +323,124 @@ async def chat(request: ChatRequest):
     if not request.question or len(request.question.strip()) < 3:
         raise HTTPException(status_code=400, detail="Question trop courte")
     
+    # Les réponses ne sont mises en cache que sans tours précédents (avec
+    # un vrai historique, la même question peut appeler une réponse
+    # différente). Le frontend incluant toujours la question courante
+    # dans l'historique, celui-ci est normalisé avant de trancher
+    cache_key = None
+    if chat_cache is not None and not prior_history(request.question, request.conversation_history):
+        question_hash = hashlib.blake2b(
+            request.question.strip().lower().encode(),
+            digest_size=16
+        ).hexdigest()
+        cache_key = (question_hash, request.use_llm, request.n_results)
+
+        cached = chat_cache.get(cache_key)
+        if cached is not None:
+            # Hit : on renvoie le résultat avec un horodatage rafraîchi
+            return ORJSONResponse({
+                **cached,
+                "timestamp": utc_timestamp(),
+                "processing_time_ms": 0
+            })
+
     try:
-        # Mesurer le temps de traitement
-        start_time = datetime.now()
-        
-        # Obtenir la réponse du système RAG avec historique
-        result = rag_system.ask(
+        # Mesurer le temps écoulé via l'horloge monotone (perf_counter_ns
+        # est une simple lecture TSC, bien moins cher que datetime.now)
+        start_ns = time.perf_counter_ns()
+
+        # Obtenir la réponse du système RAG avec historique.
+        # ask_async déporte la recherche dans un thread et appelle Gemini
+        # via le client aio : l'attente réseau ne bloque ni l'event loop
+        # ni un thread du pool
+        result = await rag_system.ask_async(
             question=request.question,
             use_llm=request.use_llm,
-            conversation_history=request.conversation_history
+            conversation_history=request.conversation_history,
+            session_id=request.session_id
         )
-        
+
         # Calculer le temps de traitement
-        processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
-        
-        # Formater la réponse
-        return {
-            "question": result["question"],
-            "answer": result["answer"],
-            "sources": result["sources"],
-            "timestamp": datetime.now().isoformat(),
-            "processing_time_ms": processing_time
-        }
+        processing_time = (time.perf_counter_ns() - start_ns) // 1_000_000
+
+        # model_construct : les données viennent du RAG (déjà sûres),
+        # on garde le schéma ChatResponse sans payer la validation Pydantic
+        response = ChatResponse.model_construct(
+            question=result["question"],
+            answer=result["answer"],
+            sources=[Source.model_construct(**s) for s in result["sources"]],
+            timestamp=utc_timestamp(),
+            processing_time_ms=processing_time
+        )
+        payload = response.model_dump()
+
+        # Ne mettre en cache que les réponses que le RAG juge rejouables
+        # (pas les messages d'erreur Gemini ni les réponses sans contexte
+        # produites pendant l'indexation de démarrage)
+        if cache_key is not None and result.get("cacheable"):
+            chat_cache[cache_key] = payload
+
+        # Formater la réponse (sérialisée directement par orjson)
+        return ORJSONResponse(payload)
         
     except Exception as e:
         print(f"❌ Erreur lors du traitement: {e}")
         raise HTTPException(status_code=500, detail=f"Erreur: {str(e)}")
 
 
+@app.post("/api/chat/stream", tags=["Chat"])
+async def chat_stream(raw_request: Request):
+    """
+    Variante SSE de /api/chat : la réponse part en fragments dès les
+    premiers tokens Gemini (premier octet en ~100-300 ms au lieu
+    d'attendre la génération complète).
+
+    Chaque évènement est une ligne `data:` contenant {"text": ...} ;
+    le dernier évènement est {"done": true, "sources": [...]}.
+    """
+    try:
+        request = _chat_request_decoder.decode(await raw_request.body())
+    except (msgspec.ValidationError, msgspec.DecodeError) as e:
+        raise HTTPException(status_code=422, detail=f"Requête invalide: {e}")
+
+    if rag_loading:
+        raise HTTPException(
+            status_code=503,
+            detail="Le système est en cours d'initialisation. Veuillez réessayer dans quelques instants."
+        )
+
+    if not rag_system:
+        raise HTTPException(
+            status_code=503,
+            detail="Système RAG non initialisé. Veuillez contacter l'administrateur."
+        )
+
+    if not request.question or len(request.question.strip()) < 3:
+        raise HTTPException(status_code=400, detail="Question trop courte")
+
+    # La préparation (caches, classification, recherche BD) part dans un
+    # thread ; ask(stream=True) rend la main dès que le générateur
+    # Gemini est créé, la génération se fait pendant l'itération
+    result = await asyncio.to_thread(
+        rag_system.ask,
+        question=request.question,
+        use_llm=request.use_llm,
+        conversation_history=request.conversation_history,
+        stream=True
+    )
+
+    def _sse_events():
+        # Générateur synchrone : Starlette l'itère dans le pool de
+        # threads, l'event loop reste libre entre deux fragments
+        for piece in result["answer_stream"]:
+            yield b"data: " + msgspec.json.encode({"text": piece}) + b"\n\n"
+        yield b"data: " + msgspec.json.encode(
+            {"done": True, "sources": result["sources"]}
+        ) + b"\n\n"
+
+    return StreamingResponse(_sse_events(), media_type="text/event-stream")
+
+
 @app.delete("/api/clear", tags=["System"])
 async def clear_conversation():
     """Efface l'historique de conversation (pour compatibilité frontend)"""
@@ -310,20 +453,37 @@ async def clear_conversation():
 # Point d'entrée pour lancer le serveur
 if __name__ == "__main__":
     import os
-    
+
     # Récupérer le port depuis les variables d'environnement (pour Render, Railway, etc.)
     port = int(os.getenv("PORT", 8000))
-    
+
+    # uvloop (boucle asyncio en C) et httptools (parseur HTTP en C)
+    # accélèrent nettement le serveur sous trafic concurrent ; fournis
+    # par uvicorn[standard], avec repli sur asyncio/h11 s'ils manquent
+    try:
+        import uvloop  # noqa: F401
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http_impl = "httptools"
+    except ImportError:
+        http_impl = "h11"
+
     print("\n" + "=" * 70)
     print("🌍 Lancement du serveur BurkinaHeritage")
     print("=" * 70)
     print(f"\n📡 API accessible sur: http://0.0.0.0:{port}")
     print("📚 Documentation: http://localhost:8000/docs")
+    print(f"⚙️  Boucle d'événements: {loop_impl} | Parseur HTTP: {http_impl}")
     print("\n" + "=" * 70 + "\n")
-    
+
     uvicorn.run(
         app,
         host="0.0.0.0",
         port=port,
-        log_level="info"
+        log_level="info",
+        loop=loop_impl,
+        http=http_impl
     )
@@ -10,11 +10,192 @@ Output: data/corpus.json (écrase l'ancien), data/sources.txt
 import os
 import json
 import csv
+import multiprocessing
 import re
+from collections import Counter
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
+
+# orjson (natif) sérialise l'UTF-8 directement en bytes, 5-10x plus vite
+# que json pour du texte français
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pyarrow.csv : parseur C++ multithreadé (SIMD), évite la construction
+# d'un dict Python par ligne qu'impose csv.DictReader
+try:
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None
+
+# xxhash (xxh3, SIMD) : empreinte 64 bits du texte nettoyé bien plus
+# rapide que le pipeline aval — les doublons sont écartés avant de payer
+# découpage et catégorisation
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Colonnes attendues dans le CSV du corpus
+_CSV_COLUMNS = ("id_doc", "url", "titre", "segment_id", "texte")
+
+
+def _text_digest(text: str) -> int:
+    """Empreinte entière du texte nettoyé (déduplication des lignes)"""
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(text)
+    return hash(text)
+
+
+@dataclass(slots=True)
+class CorpusDoc:
+    """
+    Document du corpus en représentation compacte.
+
+    Les champs (metadata comprise) sont à plat dans une dataclass à
+    slots : environ deux fois moins de mémoire qu'un dict imbriqué par
+    document, et un pickling plus léger entre workers et parent. La
+    structure JSON imbriquée n'est reconstituée qu'à la sérialisation.
+    """
+    id: int
+    title: str
+    content: str
+    source: str
+    category: str
+    word_count: int
+    id_doc: str
+    url: str
+    segment_id: str
+    chunk_index: int
+
+
+def _dump_doc(doc: CorpusDoc) -> bytes:
+    """Encode un document du corpus en JSON compact (bytes UTF-8)"""
+    if orjson is not None:
+        # Le dict imbriqué n'existe que le temps de la sérialisation
+        return orjson.dumps({
+            "id": doc.id,
+            "title": doc.title,
+            "content": doc.content,
+            "source": doc.source,
+            "category": doc.category,
+            "word_count": doc.word_count,
+            "metadata": {
+                "id_doc": doc.id_doc,
+                "url": doc.url,
+                "segment_id": doc.segment_id,
+                "chunk_index": doc.chunk_index
+            }
+        })
+    # Schéma fixe : le gabarit interpole les entiers tels quels et ne
+    # passe par l'encodeur JSON (échappement) que pour les champs texte,
+    # au lieu du parcours générique du dict par json.dumps
+    dumps = json.dumps
+    return (
+        f'{{"id":{doc.id},'
+        f'"title":{dumps(doc.title, ensure_ascii=False)},'
+        f'"content":{dumps(doc.content, ensure_ascii=False)},'
+        f'"source":{dumps(doc.source, ensure_ascii=False)},'
+        f'"category":{dumps(doc.category, ensure_ascii=False)},'
+        f'"word_count":{doc.word_count},'
+        f'"metadata":{{'
+        f'"id_doc":{dumps(doc.id_doc, ensure_ascii=False)},'
+        f'"url":{dumps(doc.url, ensure_ascii=False)},'
+        f'"segment_id":{dumps(doc.segment_id, ensure_ascii=False)},'
+        f'"chunk_index":{doc.chunk_index}}}}}'
+    ).encode('utf-8')
 from typing import List, Dict
 from datetime import datetime
 
+# Compilé une fois au chargement du module : évite le lookup du cache re
+# à chaque ligne. \s+ englobe les sauts de ligne, une seule passe suffit.
+_WS_RE = re.compile(r'\s+')
+
+# Mots (suites non-blanches) : sert à construire la table d'offsets du
+# découpage en chunks sans passer par split()
+_WORD_RE = re.compile(r'\S+')
+
+# Une alternation compilée par catégorie : la recherche tourne en C avec
+# re.I (pliage de casse interne), sans allouer de copies .lower() du chunk
+_PATRIMOINE_RE = re.compile(r'unesco|patrimoine|heritage|monument', re.I)
+_BURKINA_RE = re.compile(r'burkina|faso|ouagadougou|bobo', re.I)
+_EDUCATION_RE = re.compile(r'education|école|éducation', re.I)
+_CULTURE_RE = re.compile(r'culture|tradition|art', re.I)
+_MUSEES_RE = re.compile(r'museum|musée', re.I)
+_AUTRES_LANGUES_RE = re.compile(r'法|中文')
+_CHINESE_URL_RE = re.compile(r'chinese', re.I)
+
+# Table de suppression pour str.translate : les caractères "standards"
+# (ord <= 1000 + accents français) sont effacés, il ne reste que les
+# caractères exotiques — le comptage se fait alors en une passe C
+_ACCENTS = "àâäéèêëïîôùûüÿçÀÂÄÉÈÊËÏÎÔÙÛÜŸÇ"
+# Ordinaux des accents en frozenset : appartenance O(1) au lieu d'un
+# scan linéaire de la chaîne (utile aussi hors de la table translate)
+_ACCENT_ORDS = frozenset(map(ord, _ACCENTS))
+_STANDARD_TABLE = {c: None for c in range(0, 1001)}
+_STANDARD_TABLE.update(dict.fromkeys(_ACCENT_ORDS))
+
+# pyahocorasick : tous les mots-clés scannés simultanément en une seule
+# passe C sur le texte, au lieu d'un scan par catégorie
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Mots-clés de catégorisation -> catégorie associée
+_CATEGORY_KEYWORDS = {
+    "unesco": "patrimoine-culturel",
+    "patrimoine": "patrimoine-culturel",
+    "heritage": "patrimoine-culturel",
+    "monument": "patrimoine-culturel",
+    "burkina": "burkina-faso",
+    "faso": "burkina-faso",
+    "ouagadougou": "burkina-faso",
+    "bobo": "burkina-faso",
+    "education": "éducation",
+    "école": "éducation",
+    "éducation": "éducation",
+    "culture": "culture",
+    "tradition": "culture",
+    "art": "culture",
+    "museum": "musées",
+    "musée": "musées",
+    "法": "autres-langues",
+    "中文": "autres-langues",
+}
+
+
+def _build_category_automaton():
+    """Construit l'automate Aho-Corasick des mots-clés (une fois au chargement)"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword, category in _CATEGORY_KEYWORDS.items():
+        automaton.add_word(keyword, category)
+    automaton.make_automaton()
+    return automaton
+
+
+_CATEGORY_AUTOMATON = _build_category_automaton()
+
+
+# Processeur instancié une fois par processus worker du Pool
+_worker_processor = None
+
+
+def _init_row_worker(csv_file: str, output_dir: str):
+    """Initialise le CSVProcessor du processus worker"""
+    global _worker_processor
+    _worker_processor = CSVProcessor(csv_file, output_dir)
+
+
+def _process_row_worker(row):
+    """Transforme une ligne CSV en documents (fonction picklable pour Pool)"""
+    return _worker_processor.process_row(row)
+
 
 class CSVProcessor:
     """Traite le CSV et met à jour le corpus de données"""
@@ -24,45 +205,74 @@ class CSVProcessor:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
-        self.corpus = []
+        # Le corpus n'est pas retenu en mémoire : chaque document est
+        # écrit en flux dans corpus.json pendant process_csv, seuls les
+        # compteurs sont conservés
         self.sources = []
         self.stats = {
             "total_rows": 0,
             "total_documents": 0,
             "total_words": 0,
-            "urls_unique": set()
+            "urls_unique": set(),
+            "categories": Counter()
         }
     
     def clean_text(self, text: str) -> str:
         """Nettoie le texte extrait"""
         if not text:
             return ""
-        # Supprimer les espaces multiples
-        text = re.sub(r'\s+', ' ', text)
-        # Supprimer les sauts de ligne multiples
-        text = re.sub(r'\n+', '\n', text)
-        # Trim
-        text = text.strip()
-        return text
+        # Normaliser tous les espaces/sauts de ligne en une passe + trim
+        return _WS_RE.sub(' ', text).strip()
     
-    def categorize_document(self, title: str, text: str, url: str) -> str:
-        """Détermine la catégorie du document"""
-        title_lower = title.lower() if title else ""
-        text_lower = text.lower() if text else ""
-        url_lower = url.lower() if url else ""
-        
-        # Catégorisation par mots-clés
-        if any(word in text_lower or word in title_lower for word in ["unesco", "patrimoine", "heritage", "monument"]):
+    @staticmethod
+    def _row_category_context(title: str, url: str) -> tuple:
+        """
+        Précalcule les décisions de catégorisation invariantes par ligne.
+
+        Le titre et l'URL ne changent pas d'un chunk à l'autre : leurs
+        tests regex sont faits une seule fois par ligne au lieu d'une
+        fois par chunk.
+        """
+        title_is_patrimoine = bool(title and _PATRIMOINE_RE.search(title))
+        url_is_chinese = bool(url and _CHINESE_URL_RE.search(url))
+        return title_is_patrimoine, url_is_chinese
+
+    def categorize_document(self, row_ctx: tuple, text: str, text_lower: str = None) -> str:
+        """
+        Détermine la catégorie d'un chunk (contexte ligne précalculé).
+
+        `text_lower` permet de fournir une version minuscule déjà
+        calculée (une seule passe lower() par ligne) ; sinon elle est
+        allouée ici, seulement si l'automate en a besoin.
+        """
+        title_is_patrimoine, url_is_chinese = row_ctx
+        text = text or ""
+
+        if _CATEGORY_AUTOMATON is not None:
+            # Le titre (court) garde la priorité patrimoine, puis une
+            # unique passe Aho-Corasick sur le texte, arrêt au premier hit
+            if title_is_patrimoine:
+                return "patrimoine-culturel"
+            if text_lower is None:
+                text_lower = text.lower()
+            for _, category in _CATEGORY_AUTOMATON.iter(text_lower):
+                return category
+            if url_is_chinese:
+                return "autres-langues"
+            return "général"
+
+        # Fallback : catégorisation par alternations compilées
+        if _PATRIMOINE_RE.search(text) or title_is_patrimoine:
             return "patrimoine-culturel"
-        elif any(word in text_lower for word in ["burkina", "faso", "ouagadougou", "bobo"]):
+        elif _BURKINA_RE.search(text):
             return "burkina-faso"
-        elif "education" in text_lower or "école" in text_lower or "éducation" in text_lower:
+        elif _EDUCATION_RE.search(text):
             return "éducation"
-        elif "culture" in text_lower or "tradition" in text_lower or "art" in text_lower:
+        elif _CULTURE_RE.search(text):
             return "culture"
-        elif "museum" in text_lower or "musée" in text_lower:
+        elif _MUSEES_RE.search(text):
             return "musées"
-        elif "法" in text_lower or "中文" in text_lower or "chinese" in url_lower:
+        elif _AUTRES_LANGUES_RE.search(text) or url_is_chinese:
             return "autres-langues"
         else:
             return "général"
@@ -71,117 +281,239 @@ class CSVProcessor:
         """Vérifie si le texte est valide et exploitable"""
         if not text or len(text.strip()) < 50:
             return False
-        
+
         # Vérifier si c'est majoritairement du charabia
-        # Compter les caractères non-standard
-        non_standard = sum(1 for c in text if ord(c) > 1000 and c not in "àâäéèêëïîôùûüÿçÀÂÄÉÈÊËÏÎÔÙÛÜŸÇ")
-        ratio = non_standard / len(text) if len(text) > 0 else 0
-        
+        # Compter les caractères non-standard (translate supprime les
+        # caractères standards, le reste se mesure via len, en C)
+        non_standard = len(text.translate(_STANDARD_TABLE))
+        ratio = non_standard / len(text)
+
         # Si plus de 30% de caractères non-standard, probablement du charabia
         if ratio > 0.3:
             return False
-        
+
         return True
     
-    def chunk_text(self, text: str, max_words: int = 500) -> List[str]:
-        """Découpe le texte en chunks si trop long"""
-        words = text.split()
-        
-        if len(words) <= max_words:
-            return [text]
-        
+    @staticmethod
+    def _chunk_spans(text: str, max_words: int = 500) -> List[tuple]:
+        """
+        Bornes (début, fin, nombre_de_mots) des chunks dans le texte.
+
+        Construit la table d'offsets des mots via finditer : les chunks
+        sont décrits par des positions dans la chaîne d'origine, sans
+        split() + join() ni recopie des mots.
+        """
+        spans = [match.span() for match in _WORD_RE.finditer(text)]
+        total_words = len(spans)
+
+        if total_words <= max_words:
+            return [(0, len(text), total_words)]
+
         chunks = []
         # Découpage avec overlap de 50 mots pour maintenir le contexte
         overlap = 50
-        for i in range(0, len(words), max_words - overlap):
-            chunk = ' '.join(words[i:i + max_words])
-            if len(chunk.split()) > 50:  # Ignorer les chunks trop courts
-                chunks.append(chunk)
-        
+        for i in range(0, total_words, max_words - overlap):
+            end = min(i + max_words, total_words)
+            if end - i > 50:  # Ignorer les chunks trop courts
+                chunks.append((spans[i][0], spans[end - 1][1], end - i))
+
         return chunks
+
+    def chunk_text(self, text: str, max_words: int = 500) -> List[tuple]:
+        """
+        Découpe le texte en chunks si trop long.
+
+        Retourne des paires (texte, nombre_de_mots) : le compte est déjà
+        connu au moment du découpage, inutile de re-splitter chaque chunk
+        en aval.
+        """
+        return [
+            (text[start:end], word_count)
+            for start, end, word_count in self._chunk_spans(text, max_words)
+        ]
     
+    def _iter_rows(self):
+        """
+        Itère les lignes du CSV en tuples (id_doc, url, titre, segment_id, texte).
+
+        Avec pyarrow le fichier est parsé en C++ multithreadé et itéré en
+        colonnes ; sinon on retombe sur csv.DictReader.
+        """
+        if pacsv is not None:
+            table = pacsv.read_csv(
+                self.csv_file,
+                read_options=pacsv.ReadOptions(use_threads=True)
+            )
+            columns = [
+                table.column(name).to_pylist() if name in table.column_names
+                else [""] * table.num_rows
+                for name in _CSV_COLUMNS
+            ]
+            yield from zip(*columns)
+        else:
+            # Tampon de 1 Mo (moins de syscalls) ; newline='' est la valeur
+            # documentée pour le module csv et court-circuite la traduction
+            # universal-newlines (une passe de moins sur chaque octet)
+            with open(self.csv_file, 'r', encoding='utf-8',
+                      buffering=1 << 20, newline='') as file:
+                for row in csv.DictReader(file):
+                    yield tuple(row.get(name, '') for name in _CSV_COLUMNS)
+
+    def process_row(self, row) -> tuple:
+        """
+        Transforme une ligne CSV en (empreinte_texte, documents).
+
+        Toute la partie CPU du pipeline (nettoyage, validation, découpage,
+        catégorisation) est ici : la méthode est autonome et s'exécute
+        dans les workers du Pool. L'empreinte du texte nettoyé permet au
+        parent de dédupliquer globalement ; les ids séquentiels sont
+        attribués par le parent au moment de l'écriture.
+        """
+        # Extraire les colonnes (pyarrow peut produire None)
+        id_doc, url, titre, segment_id, texte = (value or '' for value in row)
+
+        # Nettoyer le texte
+        cleaned_text = self.clean_text(texte)
+
+        # Vérifier si le texte est valide
+        if not self.is_valid_text(cleaned_text):
+            return None, []
+
+        text_hash = _text_digest(cleaned_text)
+
+        # Découper en chunks si nécessaire (bornes dans cleaned_text)
+        chunk_spans = self._chunk_spans(cleaned_text, max_words=500)
+        n_chunks = len(chunk_spans)
+
+        # Tests titre/URL faits une fois pour toute la ligne
+        row_ctx = self._row_category_context(titre, url)
+
+        # Une seule passe lower() par ligne : les chunks minuscules sont
+        # des tranches de la même chaîne (les zones d'overlap ne sont pas
+        # re-converties). Si lower() change la longueur (très rare en
+        # Unicode), repli sur la conversion par chunk.
+        cleaned_lower = cleaned_text.lower()
+        if len(cleaned_lower) != len(cleaned_text):
+            cleaned_lower = None
+
+        # Titre du document — construit et tronqué une seule fois par
+        # ligne, le suffixe de partie est le seul élément par chunk
+        if titre:
+            doc_title = titre
+        else:
+            # Utiliser les premiers mots du texte — islice sur finditer
+            # s'arrête après 10 mots au lieu de splitter tout le texte
+            words = (m.group() for m in islice(_WORD_RE.finditer(cleaned_text), 10))
+            doc_title = ' '.join(words)
+
+        # Limiter la longueur du titre
+        if len(doc_title) > 100:
+            doc_title = doc_title[:97] + "..."
+
+        documents = []
+        for chunk_index, (start, end, word_count) in enumerate(chunk_spans):
+            chunk_text = cleaned_text[start:end]
+            chunk_lower = cleaned_lower[start:end] if cleaned_lower is not None else None
+            category = self.categorize_document(row_ctx, chunk_text, chunk_lower)
+
+            chunk_suffix = f" (partie {chunk_index + 1})" if n_chunks > 1 else ""
+
+            documents.append(CorpusDoc(
+                id=0,  # attribué par le parent (ordre d'écriture)
+                title=doc_title + chunk_suffix,
+                content=chunk_text,
+                source=url if url else f"Document {id_doc}",
+                category=category,
+                word_count=word_count,
+                id_doc=id_doc,
+                url=url,
+                segment_id=segment_id,
+                chunk_index=chunk_index if n_chunks > 1 else 0
+            ))
+
+        return text_hash, documents
+
     def process_csv(self):
         """Traite le fichier CSV"""
         print("🚀 Démarrage du traitement du CSV...\n")
-        
+
         if not self.csv_file.exists():
             print(f"❌ Fichier CSV introuvable: {self.csv_file}")
             return
-        
+
         print(f"📚 Lecture de: {self.csv_file.name}\n")
-        
+
         chunk_id = 1
         skipped = 0
-        
+
+        corpus_path = self.output_dir / "corpus.json"
+        # Compagnon JSON Lines : un document par ligne, rechargeable en
+        # flux ((json.loads(line) for line in f)) sans parser tout le
+        # fichier ni le retenir en mémoire
+        jsonl_path = self.output_dir / "corpus.jsonl"
+
         try:
-            with open(self.csv_file, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                
-                for row_num, row in enumerate(csv_reader, 1):
+            # Écriture en flux : chaque document part sur disque dès sa
+            # création, en JSON compact — la mémoire reste constante et
+            # on évite le pretty-printer de json.dump(indent=2)
+            # Les lignes sont traitées en parallèle (un CSVProcessor par
+            # worker), le parent ne fait plus que compter et écrire.
+            with open(corpus_path, 'wb') as corpus_file, \
+                 open(jsonl_path, 'wb') as jsonl_file, \
+                 multiprocessing.Pool(
+                     processes=os.cpu_count(),
+                     initializer=_init_row_worker,
+                     initargs=(str(self.csv_file), str(self.output_dir))
+                 ) as pool:
+                corpus_file.write(b"[\n")
+                first_doc = True
+
+                # Empreintes des textes déjà écrits : les lignes dupliquées
+                # sont écartées sans réécrire leurs documents
+                seen = set()
+
+                results = pool.imap_unordered(
+                    _process_row_worker, self._iter_rows(), chunksize=256
+                )
+                for row_num, (text_hash, docs) in enumerate(results, 1):
                     self.stats["total_rows"] += 1
-                    
-                    # Extraire les colonnes
-                    id_doc = row.get('id_doc', '')
-                    url = row.get('url', '')
-                    titre = row.get('titre', '')
-                    segment_id = row.get('segment_id', '')
-                    texte = row.get('texte', '')
-                    
-                    # Nettoyer le texte
-                    cleaned_text = self.clean_text(texte)
-                    
-                    # Vérifier si le texte est valide
-                    if not self.is_valid_text(cleaned_text):
+
+                    if not docs:
+                        skipped += 1
+                        continue
+
+                    if text_hash in seen:
                         skipped += 1
                         continue
-                    
+                    seen.add(text_hash)
+
                     # Ajouter l'URL aux sources uniques
+                    url = docs[0].url
                     if url:
                         self.stats["urls_unique"].add(url)
-                    
-                    # Découper en chunks si nécessaire
-                    chunks = self.chunk_text(cleaned_text, max_words=500)
-                    
-                    for chunk_index, chunk_text in enumerate(chunks):
-                        category = self.categorize_document(titre, chunk_text, url)
-                        
-                        # Titre du document
-                        if titre:
-                            doc_title = titre
-                        else:
-                            # Utiliser les premiers mots du texte
-                            words = chunk_text.split()[:10]
-                            doc_title = ' '.join(words)
-                        
-                        # Limiter la longueur du titre
-                        if len(doc_title) > 100:
-                            doc_title = doc_title[:97] + "..."
-                        
-                        chunk_suffix = f" (partie {chunk_index + 1})" if len(chunks) > 1 else ""
-                        
-                        self.corpus.append({
-                            "id": chunk_id,
-                            "title": doc_title + chunk_suffix,
-                            "content": chunk_text,
-                            "source": url if url else f"Document {id_doc}",
-                            "category": category,
-                            "word_count": len(chunk_text.split()),
-                            "metadata": {
-                                "id_doc": id_doc,
-                                "url": url,
-                                "segment_id": segment_id,
-                                "chunk_index": chunk_index if len(chunks) > 1 else 0
-                            }
-                        })
-                        
+
+                    for doc in docs:
+                        doc.id = chunk_id
+
+                        encoded = _dump_doc(doc)
+                        if not first_doc:
+                            corpus_file.write(b",\n")
+                        corpus_file.write(encoded)
+                        first_doc = False
+                        jsonl_file.write(encoded)
+                        jsonl_file.write(b"\n")
+
                         chunk_id += 1
                         self.stats["total_documents"] += 1
-                        self.stats["total_words"] += len(chunk_text.split())
-                    
+                        self.stats["total_words"] += doc.word_count
+                        self.stats["categories"][doc.category] += 1
+
                     # Afficher la progression
                     if row_num % 100 == 0:
                         print(f"  Traité: {row_num} lignes, {self.stats['total_documents']} documents créés...")
-            
+
+                corpus_file.write(b"\n]\n")
+
             print(f"\n✅ Traitement terminé!")
             print(f"   Lignes CSV traitées: {self.stats['total_rows']}")
             print(f"   Documents créés: {self.stats['total_documents']}")
@@ -191,59 +523,59 @@ class CSVProcessor:
             print(f"❌ Erreur lors du traitement: {e}")
     
     def save_corpus(self):
-        """Sauvegarde le corpus en JSON"""
+        """Résume le corpus (écrit en flux par process_csv)"""
         corpus_path = self.output_dir / "corpus.json"
-        
-        with open(corpus_path, 'w', encoding='utf-8') as f:
-            json.dump(self.corpus, f, ensure_ascii=False, indent=2)
-        
+        jsonl_path = self.output_dir / "corpus.jsonl"
+
         print(f"💾 Corpus sauvegardé: {corpus_path}")
-        print(f"   📊 {len(self.corpus)} documents créés")
+        print(f"   📄 Version JSON Lines: {jsonl_path}")
+        print(f"   📊 {self.stats['total_documents']} documents créés")
     
     def save_sources(self):
         """Sauvegarde la liste des sources"""
         sources_path = self.output_dir / "sources.txt"
-        
-        with open(sources_path, 'w', encoding='utf-8') as f:
-            f.write("=" * 60 + "\n")
-            f.write("SOURCES - BurkinaHeritage RAG System\n")
-            f.write("Culture et Patrimoine du Burkina Faso\n")
-            f.write("=" * 60 + "\n\n")
-            
-            f.write(f"Date de génération: {datetime.now().strftime('%d/%m/%Y %H:%M')}\n")
-            f.write(f"Nombre total de documents: {len(self.corpus)}\n")
-            f.write(f"Sources web uniques: {len(self.stats['urls_unique'])}\n\n")
-            
-            f.write("-" * 60 + "\n")
-            f.write("CATÉGORIES:\n")
-            f.write("-" * 60 + "\n\n")
-            
-            # Compter par catégorie
-            categories = {}
-            for doc in self.corpus:
-                cat = doc['category']
-                categories[cat] = categories.get(cat, 0) + 1
-            
-            for cat, count in sorted(categories.items()):
-                f.write(f"  • {cat}: {count} documents\n")
-            
-            f.write("\n" + "-" * 60 + "\n")
-            f.write("SOURCES WEB (échantillon):\n")
-            f.write("-" * 60 + "\n\n")
-            
-            # Afficher un échantillon d'URLs
-            for i, url in enumerate(sorted(list(self.stats['urls_unique']))[:20], 1):
-                f.write(f"{i}. {url}\n")
-            
-            if len(self.stats['urls_unique']) > 20:
-                f.write(f"\n... et {len(self.stats['urls_unique']) - 20} autres sources\n")
-            
-            f.write("\n" + "=" * 60 + "\n")
-            f.write("Tous les documents sont issus de sources\n")
-            f.write("sur la culture, l'histoire et le patrimoine\n")
-            f.write("du Burkina Faso.\n")
-            f.write("=" * 60 + "\n")
-        
+
+        # Construire le fichier en mémoire puis l'écrire d'un seul coup :
+        # une poignée d'appels write au lieu d'un par ligne
+        lines = []
+        lines.append("=" * 60)
+        lines.append("SOURCES - BurkinaHeritage RAG System")
+        lines.append("Culture et Patrimoine du Burkina Faso")
+        lines.append("=" * 60 + "\n")
+
+        lines.append(f"Date de génération: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+        lines.append(f"Nombre total de documents: {self.stats['total_documents']}")
+        lines.append(f"Sources web uniques: {len(self.stats['urls_unique'])}\n")
+
+        lines.append("-" * 60)
+        lines.append("CATÉGORIES:")
+        lines.append("-" * 60 + "\n")
+
+        # Catégories accumulées au fil du traitement (pas de re-scan),
+        # affichées de la plus fournie à la moins fournie
+        for cat, count in self.stats["categories"].most_common():
+            lines.append(f"  • {cat}: {count} documents")
+
+        lines.append("\n" + "-" * 60)
+        lines.append("SOURCES WEB (échantillon):")
+        lines.append("-" * 60 + "\n")
+
+        # Afficher un échantillon d'URLs
+        for i, url in enumerate(sorted(self.stats['urls_unique'])[:20], 1):
+            lines.append(f"{i}. {url}")
+
+        if len(self.stats['urls_unique']) > 20:
+            lines.append(f"\n... et {len(self.stats['urls_unique']) - 20} autres sources")
+
+        lines.append("\n" + "=" * 60)
+        lines.append("Tous les documents sont issus de sources")
+        lines.append("sur la culture, l'histoire et le patrimoine")
+        lines.append("du Burkina Faso.")
+        lines.append("=" * 60)
+
+        with open(sources_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            f.write("\n".join(lines) + "\n")
+
         print(f"📝 Sources sauvegardées: {sources_path}")
     
     def print_statistics(self):
@@ -267,20 +599,34 @@ class CSVProcessor:
         print("=" * 60 + "\n")
 
 
-def main():
-    """Point d'entrée principal"""
+# Fichier CSV traité par défaut (surchargeable en ligne de commande)
+DEFAULT_CSV_FILE = "Documents/burkinaheritage_corpus_clean.csv"
+
+
+def main(csv_file: str = None):
+    """
+    Point d'entrée principal.
+
+    Args:
+        csv_file (str): Chemin du CSV à traiter. None = lire la ligne de
+            commande ; un orchestrateur qui appelle main() en in-process
+            doit passer le chemin ici pour ne pas hériter de ses propres
+            arguments via sys.argv
+    """
     import sys
-    
+
     print("\n" + "=" * 60)
     print("🇧🇫 BurkinaHeritage - Préparation des Données CSV")
     print("=" * 60 + "\n")
-    
+
     # Déterminer le fichier CSV à utiliser
-    if len(sys.argv) > 1:
+    if csv_file is not None:
+        print(f"📂 Fichier CSV spécifié: {csv_file}")
+    elif len(sys.argv) > 1:
         csv_file = sys.argv[1]
         print(f"📂 Fichier CSV spécifié: {csv_file}")
     else:
-        csv_file = "Documents/burkinaheritage_corpus_clean.csv"
+        csv_file = DEFAULT_CSV_FILE
         print(f"📂 Fichier CSV par défaut: {csv_file}")
     
     # Créer le processeur
@@ -302,6 +648,7 @@ def main():
     print("🎉 Préparation terminée!")
     print("📁 Fichiers générés:")
     print("   - data/corpus.json")
+    print("   - data/corpus.jsonl")
     print("   - data/sources.txt\n")
 
 
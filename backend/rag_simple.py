@@ -18,13 +18,25 @@ Date : Novembre 2025
 Licence : Open Source
 """
 
+import asyncio
+import atexit
+import gc
+import hashlib
 import json
 import os
+import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import List, Dict
 import chromadb
-from chromadb.utils import embedding_functions
-import requests
+import numpy as np
+
+from embeddings import get_embedding_function
+
+# google.genai est importé paresseusement dans __init__ : il tire grpc
+# et protobuf, coûteux au démarrage à froid (Render Free) et inutiles
+# quand seule la voie de repli tourne (clé API absente)
 
 # Charger les variables d'environnement depuis .env
 try:
@@ -33,13 +45,274 @@ try:
 except ImportError:
     pass
 
-# Importer Google Generative AI avec la nouvelle syntaxe
+# Préambule système statique : identique à chaque appel et envoyé en
+# tête (system_instruction), ce qui laisse le cache implicite de Gemini
+# réutiliser le préfixe déjà traité d'un appel à l'autre. Trop court
+# (~40 tokens) pour le cache explicite, dont le minimum est 1024 tokens
+_GEMINI_PREAMBLE = (
+    "Tu es BurkinaHeritage, un assistant sympathique et expert sur le "
+    "Burkina Faso (culture, histoire, traditions)."
+)
+
+# Cache sémantique question→réponse : taille maximale et seuil de
+# similarité cosinus au-delà duquel deux formulations sont jugées
+# équivalentes ("Qu'est-ce que le SIAO ?" ≈ "c'est quoi le SIAO")
+_QA_CACHE_MAX = 256
+_QA_CACHE_THRESHOLD = 0.92
+
+# Cache exact (question normalisée → réponse) : servi avant même le
+# calcul de l'embedding de la question, éviction LRU
+_EXACT_CACHE_MAX = 512
+
+# Sessions de chat Gemini conservées par session_id : l'historique vit
+# côté API (avec son cache de tokens), chaque tour n'envoie que la
+# nouvelle question et ses documents, éviction LRU
+_CHAT_SESSIONS_MAX = 64
+
+# pyahocorasick : tous les mots-clés de classification des questions
+# scannés en une seule passe C, au lieu d'un any(kw in query) par liste
 try:
-    from google import genai
-    GEMINI_AVAILABLE = True
+    import ahocorasick
 except ImportError:
-    GEMINI_AVAILABLE = False
-    print("⚠️  google-genai non installé. Installation: pip install google-genai")
+    ahocorasick = None
+
+# Mots-clés culturels (on privilégie la catégorie culture)
+_CULTURAL_KEYWORDS = (
+    "griot", "balafon", "djembé", "kora", "musique", "danse", "tradition",
+    "masque", "fespaco", "siao", "artisan", "tissage", "poterie", "bronze",
+    "cérémonie", "rite", "ancêtre", "chef", "roi", "royaume", "ethnie",
+    "mossi", "peul", "bobo", "lobi", "gourounsi", "touareg"
+)
+
+# Mots-clés architecturaux
+_ARCHITECTURAL_KEYWORDS = (
+    "grenier", "case", "maison", "habitat", "construction", "architecture",
+    "mosquée", "bâtiment", "édifice", "banco", "terre", "paille"
+)
+
+# Mots-clés supplémentaires déclenchant une recherche documentaire
+# (histoire, lieux, tournures de question explicites)
+_SEARCH_ONLY_KEYWORDS = (
+    "histoire", "indépendance", "thomas sankara", "sankara", "mogho naba",
+    "empire", "colonial", "français", "guerre",
+    "ouagadougou", "bobo-dioulasso", "banfora", "ville", "région",
+    "qui est", "qu'est-ce que", "c'est quoi", "parle-moi de",
+    "explique", "raconte", "définition", "signification"
+)
+
+
+# Découpage en phrases du fallback : compilé une fois au chargement au
+# lieu d'une recompilation (et d'un import re) par document
+_SENT_RE = re.compile(r'[.!?]\s+')
+
+# Salutations : constantes de module (plus de listes reconstruites à
+# chaque appel). L'égalité exacte se teste en O(1) sur le frozenset.
+_SIMPLE_GREETINGS = frozenset({
+    "bonjour", "salut", "bonsoir", "coucou", "hey", "hello", "hi", "yo"
+})
+
+# Dispatch des conversations simples : un token déclencheur → une
+# intention, résolue en un seul parcours des mots de la question au
+# lieu d'un any() par famille de déclencheurs
+_CHAT_TRIGGERS = {
+    "bonjour": "greeting", "bonsoir": "greeting", "salut": "greeting",
+    "hello": "greeting", "yo": "greeting", "hey": "greeting",
+    "coucou": "greeting", "hi": "greeting",
+    "vas": "status", "va": "status", "allez-vous": "status",
+    "es-tu": "identity", "êtes-vous": "identity", "nom": "identity",
+    "qui": "identity",
+    "sais-tu": "capabilities", "connais-tu": "capabilities",
+    "peux-tu": "capabilities", "connais": "capabilities",
+}
+
+_CHAT_RESPONSES = {
+    "greeting": """Bonjour ! 👋
+
+Je suis BurkinaHeritage, votre assistant culturel sur le Burkina Faso.
+
+Posez-moi des questions sur la culture, l'histoire, les traditions, l'architecture... Je suis là pour vous aider ! 😊""",
+    "status": "Je vais très bien, merci ! 😊 Prêt à répondre à vos questions sur le Burkina Faso !",
+    "identity": """Je suis **BurkinaHeritage**, un assistant culturel spécialisé dans le patrimoine du Burkina Faso. 🇧🇫
+
+Je dispose de 370 documents sur la culture, l'architecture, l'histoire et bien plus encore.
+
+Posez-moi des questions précises pour en savoir plus ! 📚""",
+    "capabilities": """Je connais beaucoup de choses sur le **Burkina Faso** ! 🇧🇫
+
+Mes domaines d'expertise :
+• 🎭 Culture (traditions, griots, musique, artisanat)
+• 🏛️ Architecture traditionnelle
+• 📚 Histoire et grands personnages
+• 🎬 Événements culturels (FESPACO, SIAO...)
+• 🌍 Patrimoine et société
+
+Posez-moi une question spécifique ! 😊""",
+}
+
+# Segments statiques des 4 prompts Gemini, découpés autour des parties
+# dynamiques (historique, contexte, question). Un seul "".join() par
+# appel — une allocation C dimensionnée d'avance — au lieu de
+# reconstruire ~2 Ko de f-string fragment par fragment.
+
+# Contexte + historique : (head, history, mid, context, tail, question, fin)
+_PROMPT_CTX_HIST = (
+    "HISTORIQUE DE LA CONVERSATION :\n",
+    "\n\nCONTEXTE TROUVÉ DANS MA BASE DE DONNÉES :\n",
+    "\n\nQUESTION DE L'UTILISATEUR : ",
+    """
+
+TA MISSION :
+1. TIENS COMPTE de l'historique de conversation ci-dessus pour comprendre le contexte
+2. Utilise les informations du contexte de ma base de données comme BASE
+3. Reformule de manière claire et fluide (pas de copier-coller)
+4. Tu peux COMPLÉTER avec tes propres connaissances si nécessaire
+5. Si la question fait référence à quelque chose dans l'historique (comme "elle", "il", "le SIAO", etc.), utilise cet historique
+6. Réponds de manière naturelle et informative (2-4 phrases)
+
+IMPORTANT : Réponds de façon cohérente avec la conversation précédente.
+
+RÉPONSE (en français, naturelle et complète) :""",
+)
+
+# Contexte seul : (head, context, mid, question, fin)
+_PROMPT_CTX = (
+    "CONTEXTE TROUVÉ DANS MA BASE DE DONNÉES :\n",
+    "\n\nQUESTION DE L'UTILISATEUR : ",
+    """
+
+TA MISSION :
+1. Utilise les informations du contexte ci-dessus comme BASE
+2. Reformule de manière claire et fluide (pas de copier-coller)
+3. Tu peux COMPLÉTER avec tes propres connaissances si nécessaire
+4. Tu peux CORRIGER si une information semble incorrecte
+5. Réponds de manière naturelle et informative (2-4 phrases)
+
+IMPORTANT : Même si le contexte ne répond pas parfaitement, utilise tes connaissances du Burkina Faso pour donner une réponse complète et utile.
+
+RÉPONSE (en français, naturelle et complète) :""",
+)
+
+# Historique seul : (head, history, mid, question, fin)
+_PROMPT_HIST = (
+    "HISTORIQUE DE LA CONVERSATION :\n",
+    "\n\nQUESTION : ",
+    """
+
+TA MISSION :
+- TIENS COMPTE de l'historique pour comprendre le contexte
+- Si la question fait référence à la conversation précédente, utilise cet historique
+- Si c'est une salutation → réponds chaleureusement
+- Si c'est une question sur le Burkina Faso → réponds avec tes connaissances
+- Reste naturel, sympathique et cohérent avec la conversation
+- Réponds en français (1-3 phrases)
+
+RÉPONSE (naturelle, sympathique et cohérente) :""",
+)
+
+# Question seule : (head, question, fin)
+_PROMPT_PLAIN = (
+    "QUESTION : ",
+    """
+
+CONTEXTE : C'est une question conversationnelle ou aucune donnée spécifique n'est nécessaire.
+
+TA MISSION :
+- Si c'est une salutation (bonjour, salut, etc.) → réponds chaleureusement et brièvement
+- Si c'est une question sur toi → explique que tu es un assistant sur le Burkina Faso
+- Si c'est une question sur le Burkina Faso → réponds avec tes connaissances
+- Reste naturel, sympathique et concis (1-3 phrases)
+- Réponds en français
+
+RÉPONSE (naturelle et sympathique) :""",
+)
+
+
+def _build_query_automaton():
+    """Construit l'automate des mots-clés de questions (au chargement)"""
+    if ahocorasick is None:
+        return None
+    tags_by_keyword = {}
+    for keyword in _CULTURAL_KEYWORDS:
+        tags_by_keyword.setdefault(keyword, set()).update(("culture", "search"))
+    for keyword in _ARCHITECTURAL_KEYWORDS:
+        tags_by_keyword.setdefault(keyword, set()).update(("architecture", "search"))
+    for keyword in _SEARCH_ONLY_KEYWORDS:
+        tags_by_keyword.setdefault(keyword, set()).add("search")
+    automaton = ahocorasick.Automaton()
+    for keyword, tags in tags_by_keyword.items():
+        automaton.add_word(keyword, frozenset(tags))
+    automaton.make_automaton()
+    return automaton
+
+
+_QUERY_AUTOMATON = _build_query_automaton()
+
+# Fallback sans pyahocorasick : une seule alternation compilée avec un
+# groupe nommé par famille de mots-clés — un unique scan C du texte
+# classe la question, au lieu d'un passage par famille
+if _QUERY_AUTOMATON is None:
+    _QUERY_RE = re.compile(
+        "(?P<culture>" + "|".join(map(re.escape, _CULTURAL_KEYWORDS)) + ")"
+        "|(?P<architecture>" + "|".join(map(re.escape, _ARCHITECTURAL_KEYWORDS)) + ")"
+        "|(?P<search>" + "|".join(map(re.escape, _SEARCH_ONLY_KEYWORDS)) + ")"
+    )
+else:
+    _QUERY_RE = None
+
+
+def _query_tags(query_lower: str) -> set:
+    """
+    Classifie une question (déjà en minuscules) en un seul passage.
+
+    Returns:
+        set: Sous-ensemble de {"culture", "architecture", "search"}
+    """
+    if _QUERY_AUTOMATON is not None:
+        tags = set()
+        for _, keyword_tags in _QUERY_AUTOMATON.iter(query_lower):
+            tags |= keyword_tags
+            if len(tags) == 3:
+                break
+        return tags
+    # Fallback sans pyahocorasick : l'alternation unique balaye le texte
+    # une seule fois, chaque correspondance révèle sa famille via le
+    # groupe nommé qui a matché
+    tags = set()
+    for match in _QUERY_RE.finditer(query_lower):
+        group = match.lastgroup
+        if group == "culture":
+            tags.update(("culture", "search"))
+        elif group == "architecture":
+            tags.update(("architecture", "search"))
+        else:
+            tags.add("search")
+        if len(tags) == 3:
+            break
+    return tags
+
+
+def prior_history(question: str, conversation_history: List[Dict]) -> List[Dict]:
+    """
+    Historique des tours PRÉCÉDENTS d'une conversation.
+
+    Le frontend envoie toujours la question courante en fin d'historique
+    (même au premier tour) : la retirer avant de décider si la réponse
+    peut venir d'un cache, sinon aucun palier ne sert jamais. Un
+    historique sans échange complet (user + assistant) vaut vide.
+
+    Returns:
+        List[Dict]: Les messages des tours précédents, ou []
+    """
+    if not conversation_history:
+        return []
+    history = conversation_history
+    last = history[-1]
+    if (last.get("role") == "user"
+            and last.get("content", "").strip().lower() == question.strip().lower()):
+        history = history[:-1]
+    if len(history) < 2:
+        return []
+    return history
 
 
 class BurkinaHeritageRAGSimple:
@@ -53,12 +326,26 @@ class BurkinaHeritageRAGSimple:
     - Générer des réponses à partir du contexte récupéré
     
     Attributes:
-        corpus (List[Dict]): Liste des documents chargés
+        ids, titles, contents, sources, categories (List): Corpus chargé
+            en colonnes (une liste par champ)
         collection: Collection ChromaDB pour la recherche vectorielle
         hf_token (str): Token Hugging Face (optionnel)
         hf_api_url (str): URL de l'API Hugging Face
     """
-    
+
+    # __slots__ : pas de __dict__ par instance, et les fautes de frappe
+    # d'attributs lèvent AttributeError à l'écriture
+    __slots__ = (
+        "corpus_path", "chroma_dir",
+        "ids", "titles", "contents", "sources", "categories",
+        "chroma_client", "collection", "embedding_function",
+        "_indexing_done",
+        "gemini_api_key", "gemini_client", "_chat_sessions",
+        "hf_token", "hf_api_url",
+        "qa_cache_path", "_qa_cache", "_qa_cache_q8", "_qa_cache_scale",
+        "_exact_cache", "_cache_lock",
+    )
+
     def __init__(
         self,
         corpus_path: str = "data/corpus.json",
@@ -68,7 +355,8 @@ class BurkinaHeritageRAGSimple:
         Initialise le système RAG.
         
         Args:
-            corpus_path (str): Chemin vers le fichier JSON contenant le corpus
+            corpus_path (str): Chemin vers le fichier JSON contenant le
+                corpus (le .jsonl voisin est préféré s'il est plus récent)
             chroma_dir (str): Répertoire de stockage de ChromaDB
             
         Raises:
@@ -81,20 +369,44 @@ class BurkinaHeritageRAGSimple:
         
         print("🚀 Initialisation du système RAG BurkinaHeritage...")
         
+        # Le scraper ajoute désormais au corpus en JSONL : charger le
+        # plus récent des deux formats (même logique que rebuild_database),
+        # sinon l'API servirait une vue figée d'avant le dernier scrape
+        jsonl_path = self.corpus_path.with_suffix('.jsonl')
+        use_jsonl = jsonl_path.exists() and (
+            not self.corpus_path.exists()
+            or jsonl_path.stat().st_mtime >= self.corpus_path.stat().st_mtime
+        )
+
         # Charger le corpus avec limite pour économiser la mémoire
-        print(f"📚 Chargement du corpus: {self.corpus_path}")
-        with open(self.corpus_path, 'r', encoding='utf-8') as f:
-            full_corpus = json.load(f)
-        
+        if use_jsonl:
+            print(f"📚 Chargement du corpus: {jsonl_path}")
+            with open(jsonl_path, 'r', encoding='utf-8') as f:
+                full_corpus = [json.loads(line) for line in f if line.strip()]
+        else:
+            print(f"📚 Chargement du corpus: {self.corpus_path}")
+            with open(self.corpus_path, 'r', encoding='utf-8') as f:
+                full_corpus = json.load(f)
+
         # OPTIMISATION ULTRA pour Render Free (512MB RAM): Limiter à 100 documents
-        max_docs = 100
+        # par défaut ; surchargeable via RAG_MAX_DOCS maintenant que les
+        # embeddings sont quantifiés SQ8 sur disque et indexés en un appel
+        max_docs = int(os.getenv("RAG_MAX_DOCS", "100"))
         if len(full_corpus) > max_docs:
             print(f"⚠️  Limitation à {max_docs} documents (au lieu de {len(full_corpus)}) pour optimisation mémoire Render Free")
-            self.corpus = full_corpus[:max_docs]
-        else:
-            self.corpus = full_corpus
-        
-        print(f"✅ {len(self.corpus)} documents chargés")
+            full_corpus = full_corpus[:max_docs]
+
+        # Disposition en colonnes (SoA) : une liste par champ au lieu
+        # d'un dict par document — un seul lookup de clé par champ à la
+        # conversion, et des listes contiguës prêtes pour collection.add
+        self.ids = [doc["id"] for doc in full_corpus]
+        self.titles = [doc["title"] for doc in full_corpus]
+        self.contents = [doc["content"] for doc in full_corpus]
+        self.sources = [doc["source"] for doc in full_corpus]
+        self.categories = [doc["category"] for doc in full_corpus]
+        del full_corpus
+
+        print(f"✅ {len(self.contents)} documents chargés")
         
         # Initialiser ChromaDB avec embeddings RAPIDES
         # OPTIMISATION: Utiliser DefaultEmbeddingFunction (modèle pré-installé avec ChromaDB)
@@ -113,21 +425,30 @@ class BurkinaHeritageRAGSimple:
             settings=settings
         )
         
-        # OPTIMISATION: DefaultEmbeddingFunction = ONNX pré-installé (pas de téléchargement)
-        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        # OPTIMISATION: GPU (sentence-transformers) si disponible, sinon
+        # l'instance ONNX partagée épinglée à 1 thread (voir embeddings)
+        self.embedding_function = get_embedding_function()
         
         # Configuration des LLMs (ordre de priorité)
-        # 1. Gemini API (Google)
+        # 1. Gemini API (Google) — import paresseux, seulement si la clé
+        # est présente (grpc/protobuf restent hors du chemin de repli)
+        self.gemini_client = None
+        # Sessions de chat par session_id (tours delta, éviction LRU)
+        self._chat_sessions = OrderedDict()
         self.gemini_api_key = os.getenv("GEMINI_API_KEY", "")
-        if self.gemini_api_key and GEMINI_AVAILABLE:
-            # Configurer avec la clé API
-            os.environ["GEMINI_API_KEY"] = self.gemini_api_key
-            self.gemini_client = genai.Client(api_key=self.gemini_api_key)
-            print("✅ Gemini API configurée")
+        if self.gemini_api_key:
+            try:
+                from google import genai
+            except ImportError:
+                genai = None
+                print("⚠️  google-genai non installé. Installation: pip install google-genai")
+            if genai is not None:
+                # Configurer avec la clé API
+                os.environ["GEMINI_API_KEY"] = self.gemini_api_key
+                self.gemini_client = genai.Client(api_key=self.gemini_api_key)
+                print("✅ Gemini API configurée")
         else:
-            self.gemini_client = None
-            if not self.gemini_api_key:
-                print("⚠️  GEMINI_API_KEY non définie (variable d'environnement)")
+            print("⚠️  GEMINI_API_KEY non définie (variable d'environnement)")
         
         # 2. Hugging Face (fallback)
         self.hf_token = os.getenv("HUGGINGFACE_TOKEN", "")
@@ -135,9 +456,234 @@ class BurkinaHeritageRAGSimple:
         
         # Setup collection
         self._setup_collection()
-        
+
+        # Cache sémantique : les réponses déjà générées sont réutilisées
+        # pour les reformulations proches (un produit scalaire remplace
+        # retrieval + appel Gemini). Embeddings quantifiés int8 + échelle
+        # par vecteur : 4x moins de mémoire, gemv entier via BLAS
+        self.qa_cache_path = self.corpus_path.parent / "qa_cache.npz"
+        self._qa_cache = []           # [(question, résultat), ...] ordre d'insertion
+        self._qa_cache_q8 = None      # embeddings quantifiés int8 (N, d)
+        self._qa_cache_scale = None   # échelles de déquantification float32 (N,)
+        # Palier exact : question normalisée → réponse, sans embedding
+        self._exact_cache = OrderedDict()
+        # Verrou des deux paliers : ask_async lit les caches depuis le
+        # pool de threads pendant que les stores s'exécutent sur l'event
+        # loop (même motif que le verrou de l'embedder partagé)
+        self._cache_lock = threading.Lock()
+        self._load_qa_cache()
+        atexit.register(self._save_qa_cache)
+
         print("✅ Système RAG initialisé!\n")
     
+    def _embed_question(self, question: str) -> np.ndarray:
+        """Embedding normalisé (float32) de la question"""
+        vec = np.asarray(self.embedding_function([question])[0], dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    @staticmethod
+    def _quantize_vec(vec: np.ndarray):
+        """
+        Quantifie un embedding normalisé en int8 symétrique.
+
+        Returns:
+            tuple: (q8 int8, échelle float32 telle que vec ≈ q8 * échelle)
+        """
+        absmax = float(np.max(np.abs(vec))) if vec.size else 0.0
+        if absmax == 0.0:
+            return vec.astype(np.int8), 0.0
+        scale = absmax / 127.0
+        return np.round(vec / scale).astype(np.int8), scale
+
+    def _qa_cache_lookup(self, q_vec: np.ndarray):
+        """
+        Cherche une question déjà répondue assez proche de q_vec.
+
+        Returns:
+            Dict: Résultat mis en cache (answer, sources), ou None
+        """
+        q8, q_scale = self._quantize_vec(q_vec)
+        # Verrou : les lookups tournent dans le pool de threads pendant
+        # que les stores tournent sur l'event loop — la liste et la
+        # matrice doivent être lues alignées
+        with self._cache_lock:
+            if self._qa_cache_q8 is None or len(self._qa_cache) == 0:
+                return None
+            # Cosinus reconstruit : gemv entier (int8 x int32 -> int32, les
+            # produits partiels débordent int16) puis remise à l'échelle
+            dots = self._qa_cache_q8 @ q8.astype(np.int32)
+            sims = dots.astype(np.float32) * self._qa_cache_scale * q_scale
+            best = int(np.argmax(sims))
+            if sims[best] >= _QA_CACHE_THRESHOLD:
+                return self._qa_cache[best][1]
+        return None
+
+    def _qa_cache_store(self, q_vec: np.ndarray, question: str, result: Dict):
+        """Insère une paire question/réponse (éviction de la plus ancienne)"""
+        q8, scale = self._quantize_vec(q_vec)
+        row = q8.reshape(1, -1)
+        with self._cache_lock:
+            if len(self._qa_cache) >= _QA_CACHE_MAX:
+                self._qa_cache.pop(0)
+                self._qa_cache_q8 = self._qa_cache_q8[1:]
+                self._qa_cache_scale = self._qa_cache_scale[1:]
+            self._qa_cache.append((question, result))
+            if self._qa_cache_q8 is None:
+                self._qa_cache_q8 = row
+                self._qa_cache_scale = np.array([scale], dtype=np.float32)
+            else:
+                self._qa_cache_q8 = np.vstack((self._qa_cache_q8, row))
+                self._qa_cache_scale = np.append(
+                    self._qa_cache_scale, np.float32(scale)
+                )
+
+    def _exact_cache_lookup(self, question_lower: str):
+        """
+        Cherche une réponse par correspondance exacte (et la marque MRU).
+
+        Returns:
+            Dict: Résultat mis en cache (answer, sources), ou None
+        """
+        with self._cache_lock:
+            result = self._exact_cache.get(question_lower)
+            if result is not None:
+                self._exact_cache.move_to_end(question_lower)
+            return result
+
+    def _exact_cache_store(self, question_lower: str, result: Dict):
+        """Insère une réponse dans le cache exact (éviction LRU)"""
+        with self._cache_lock:
+            self._exact_cache[question_lower] = result
+            self._exact_cache.move_to_end(question_lower)
+            if len(self._exact_cache) > _EXACT_CACHE_MAX:
+                self._exact_cache.popitem(last=False)
+
+    def _load_qa_cache(self):
+        """Recharge le cache sémantique persisté (si présent)"""
+        if not self.qa_cache_path.exists():
+            return
+        try:
+            data = np.load(self.qa_cache_path, allow_pickle=False)
+            entries = json.loads(str(data["entries"]))
+            self._qa_cache = [(q, r) for q, r in entries]
+            self._qa_cache_q8 = data["cache_q8"].astype(np.int8)
+            self._qa_cache_scale = data["cache_scale"].astype(np.float32)
+            print(f"⚡ Cache sémantique rechargé: {len(self._qa_cache)} entrées")
+        except Exception as e:
+            print(f"⚠️  Cache sémantique illisible, ignoré: {e}")
+            self._qa_cache = []
+            self._qa_cache_q8 = None
+            self._qa_cache_scale = None
+
+    def _save_qa_cache(self):
+        """Persiste le cache sémantique sur disque (appelé à l'arrêt)"""
+        with self._cache_lock:
+            if not self._qa_cache or self._qa_cache_q8 is None:
+                return
+            try:
+                entries = json.dumps(self._qa_cache, ensure_ascii=False)
+                np.savez(
+                    self.qa_cache_path,
+                    cache_q8=self._qa_cache_q8,
+                    cache_scale=self._qa_cache_scale,
+                    entries=np.array(entries)
+                )
+            except Exception:
+                pass
+
+    def _gemini_generate(self, prompt: str):
+        """
+        Appelle Gemini avec le préambule système en tête.
+
+        Le préambule (~40 tokens) est trop court pour le cache explicite
+        (minimum 1024 tokens) : on s'appuie sur le cache implicite de
+        Gemini, qui réutilise le préfixe stable d'un appel à l'autre
+        tant qu'il arrive en premier (system_instruction).
+        """
+        return self.gemini_client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=prompt,
+            config={"system_instruction": _GEMINI_PREAMBLE}
+        )
+
+    async def _gemini_generate_async(self, prompt: str):
+        """
+        Jumeau asynchrone de _gemini_generate (client aio).
+
+        L'attente HTTP de 1-2 s rend la main à l'event loop au lieu
+        d'occuper un thread du pool.
+        """
+        return await self.gemini_client.aio.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=prompt,
+            config={"system_instruction": _GEMINI_PREAMBLE}
+        )
+
+    def _gemini_generate_stream(self, prompt: str):
+        """
+        Variante streaming de _gemini_generate : itère les chunks Gemini.
+
+        Le premier token arrive en 100-300 ms au lieu d'attendre la
+        génération complète (1-2 s).
+        """
+        return self.gemini_client.models.generate_content_stream(
+            model="gemini-2.5-flash",
+            contents=prompt,
+            config={"system_instruction": _GEMINI_PREAMBLE}
+        )
+
+    @staticmethod
+    def _history_contents(conversation_history: List[Dict]):
+        """Convertit l'historique frontend en contenus Gemini (user/model)"""
+        from google.genai import types
+        contents = []
+        for msg in conversation_history:
+            text = msg.get("content", "")
+            if not text:
+                continue
+            role = "user" if msg.get("role") == "user" else "model"
+            contents.append(types.Content(role=role, parts=[types.Part(text=text)]))
+        return contents
+
+    def _get_chat_session(self, session_id: str, conversation_history: List[Dict], aio: bool = False):
+        """
+        Retourne la session de chat Gemini de session_id (créée au besoin).
+
+        L'historique de la conversation vit côté Gemini dans la session :
+        les tours suivants n'envoient que la nouvelle question et ses
+        documents, et le cache de tokens du serveur réutilise le préfixe
+        déjà traité au lieu de le re-préremplir à chaque tour.
+
+        Une session créée en cours de conversation (redémarrage, éviction
+        LRU) est ressemée avec l'historique fourni par le frontend.
+
+        Args:
+            session_id (str): Identifiant de conversation du frontend
+            conversation_history (List[Dict]): Historique complet, dont le
+                dernier message est la question du tour courant
+            aio (bool): Session asynchrone (client aio) ou synchrone
+
+        Returns:
+            Session de chat Gemini (Chat ou AsyncChat)
+        """
+        key = (session_id, "aio" if aio else "sync")
+        chat = self._chat_sessions.get(key)
+        if chat is not None:
+            self._chat_sessions.move_to_end(key)
+            return chat
+
+        factory = self.gemini_client.aio.chats if aio else self.gemini_client.chats
+        chat = factory.create(
+            model="gemini-2.5-flash",
+            config={"system_instruction": _GEMINI_PREAMBLE},
+            history=self._history_contents(conversation_history[:-1])
+        )
+        self._chat_sessions[key] = chat
+        if len(self._chat_sessions) > _CHAT_SESSIONS_MAX:
+            self._chat_sessions.popitem(last=False)
+        return chat
+
     def _setup_collection(self):
         """
         Configure la collection ChromaDB pour stocker les embeddings.
@@ -149,7 +695,8 @@ class BurkinaHeritageRAGSimple:
             La collection est nommée "burkina_culture" et stockée de manière persistante
         """
         collection_name = "burkina_culture"
-        
+        self._indexing_done = threading.Event()
+
         try:
             # Essayer de charger la collection existante
             self.collection = self.chroma_client.get_collection(
@@ -157,70 +704,117 @@ class BurkinaHeritageRAGSimple:
                 embedding_function=self.embedding_function
             )
             print(f"📂 Collection chargée: {self.collection.count()} documents")
-            
+            self._indexing_done.set()
+
         except Exception:
-            # Créer une nouvelle collection
+            # Créer une nouvelle collection et indexer en arrière-plan :
+            # l'init rend la main tout de suite, ask() répond sans
+            # contexte (Gemini pur) jusqu'à la fin de l'indexation
             print(f"🆕 Création de la collection...")
             self.collection = self.chroma_client.create_collection(
                 name=collection_name,
                 embedding_function=self.embedding_function,
                 metadata={"description": "Culture du Burkina Faso"}
             )
-            self._index_documents()
+            threading.Thread(target=self._index_documents, daemon=True).start()
     
+    def _compute_or_load_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Calcule les embeddings du corpus, ou les recharge depuis le disque.
+
+        Le fichier est nommé d'après le hash du contenu : tout changement
+        de corpus invalide naturellement le cache, et un redémarrage à
+        froid saute entièrement la passe ONNX (le coût dominant de
+        l'indexation).
+
+        Les vecteurs sont quantifiés en SQ8 (int8 + échelle par vecteur)
+        sur disque : 4x plus compact, et l'erreur de reconstruction
+        (<0.5%) est négligeable devant le bruit de la similarité cosinus.
+        """
+        content_hash = hashlib.md5("\n".join(texts).encode('utf-8')).hexdigest()
+        cache_path = self.corpus_path.parent / f"emb_{content_hash}.npz"
+
+        if cache_path.exists():
+            print(f"⚡ Embeddings rechargés: {cache_path.name}")
+            data = np.load(cache_path)
+            return data["q8"].astype(np.float32) * data["scale"][:, None]
+
+        print("🧮 Calcul des embeddings du corpus (passe unique)...")
+        embeddings = np.asarray(self.embedding_function(texts), dtype=np.float32)
+        try:
+            # Quantification SQ8 : échelle = max absolu par vecteur / 127
+            scale = np.abs(embeddings).max(axis=1) / 127.0
+            scale[scale == 0] = 1.0
+            q8 = np.round(embeddings / scale[:, None]).astype(np.int8)
+            np.savez(cache_path, q8=q8, scale=scale.astype(np.float32))
+            print(f"💾 Embeddings sauvegardés (SQ8): {cache_path.name}")
+        except Exception as e:
+            print(f"⚠️  Embeddings non persistés: {e}")
+        return embeddings
+
     def _index_documents(self):
         """
         Indexe tous les documents du corpus dans ChromaDB.
-        
-        ULTRA-OPTIMISÉ pour environnements à très faible mémoire (512 MB).
-        Les documents sont traités par micro-batches de 20 au lieu de 50.
-        
-        Process:
-            1. Diviser le corpus en micro-batches de 20
-            2. Pour chaque batch : extraire texte, métadonnées et IDs
-            3. Ajouter à la collection ChromaDB
-            4. Libérer agressivement la mémoire entre chaque batch
-            5. Afficher la progression
+
+        Les embeddings sont calculés (ou rechargés) en une seule passe
+        puis fournis directement à ChromaDB en un unique appel add :
+        une seule transaction SQLite / insertion HNSW au lieu d'un
+        aller-retour par micro-batch.
         """
         print("🔄 Indexation des documents...")
-        
-        # OPTIMISATION ULTRA pour Render Free: Réduire la taille des batches à 10
-        batch_size = 10  # Réduit de 20 à 10 pour Render Free (512MB RAM)
-        
-        for i in range(0, len(self.corpus), batch_size):
-            batch = self.corpus[i:i + batch_size]
-            
-            # Préparer les données
-            documents = [doc["content"] for doc in batch]
-            metadatas = [
-                {
-                    "title": doc["title"],
-                    "source": doc["source"],
-                    "category": doc["category"]
-                }
-                for doc in batch
-            ]
-            ids = [f"doc_{doc['id']}" for doc in batch]
-            
-            # Ajouter à ChromaDB
+
+        embeddings = self._compute_or_load_embeddings(self.contents)
+
+        metadatas = [
+            {
+                "title": title,
+                "source": source,
+                "category": category,
+                # Extrait pré-tronqué pour les prompts : évite de re-slicer
+                # le contenu à chaque requête
+                "preview": content[:500]
+            }
+            for title, source, category, content in zip(
+                self.titles, self.sources, self.categories, self.contents
+            )
+        ]
+        ids = [f"doc_{doc_id}" for doc_id in self.ids]
+
+        # Suspendre le GC incrémental pendant l'insertion en masse (il
+        # parcourrait tout le tas à chaque seuil d'allocations), puis une
+        # seule collecte à la fin
+        gc.disable()
+        try:
             self.collection.add(
-                documents=documents,
+                documents=self.contents,
                 metadatas=metadatas,
-                ids=ids
+                ids=ids,
+                embeddings=embeddings.tolist()
             )
-            
-            # OPTIMISATION MAXIMALE: Libérer agressivement la mémoire
-            del documents, metadatas, ids, batch
-            import gc
-            gc.collect()
-            
-            # Afficher progression réduite (tous les 100 docs)
-            if (i + batch_size) % 100 == 0 or (i + batch_size) >= len(self.corpus):
-                print(f"  ✓ {min(i + batch_size, len(self.corpus))}/{len(self.corpus)} indexés")
-        
+        finally:
+            gc.enable()
+        gc.collect()
+
+        total = len(self.contents)
+        print(f"  ✓ {total}/{total} indexés")
+        self._indexing_done.set()
         print("✅ Indexation terminée!")
     
-    def search_documents(self, query: str, n_results: int = 3) -> List[Dict]:
+    def _classify_query(self, question: str) -> Dict:
+        """
+        Classifie la question en une seule passe de mots-clés.
+
+        Returns:
+            Dict: {"needs_search", "prefer_culture", "prefer_architecture"}
+        """
+        tags = _query_tags(question.lower().strip())
+        return {
+            "needs_search": "search" in tags,
+            "prefer_culture": "culture" in tags,
+            "prefer_architecture": "architecture" in tags
+        }
+
+    def search_documents(self, query: str, n_results: int = 3, classification: Dict = None) -> List[Dict]:
         """
         Recherche les documents les plus pertinents par similarité vectorielle.
         
@@ -233,7 +827,9 @@ class BurkinaHeritageRAGSimple:
         Args:
             query (str): Question ou requête de l'utilisateur
             n_results (int): Nombre de documents à retourner (défaut: 3, réduit de 5)
-            
+            classification (Dict): Résultat de _classify_query déjà calculé
+                par l'appelant (évite de re-scanner la question)
+
         Returns:
             List[Dict]: Liste des documents pertinents avec leur contenu et métadonnées
             
@@ -241,26 +837,18 @@ class BurkinaHeritageRAGSimple:
             >>> rag.search_documents("Qu'est-ce que le balafon ?", n_results=3)
             [{"content": "...", "metadata": {"title": "...", "source": "..."}}]
         """
-        # Détection intelligente de catégorie
-        query_lower = query.lower()
-        
-        # Mots-clés culturels (on privilégie la catégorie culture)
-        cultural_keywords = [
-            "griot", "balafon", "djembé", "kora", "musique", "danse", "tradition",
-            "masque", "fespaco", "siao", "artisan", "tissage", "poterie", "bronze",
-            "cérémonie", "rite", "ancêtre", "chef", "roi", "royaume", "ethnie",
-            "mossi", "peul", "bobo", "lobi", "gourounsi", "touareg"
-        ]
-        
-        # Mots-clés architecturaux
-        architectural_keywords = [
-            "grenier", "case", "maison", "habitat", "construction", "architecture",
-            "mosquée", "bâtiment", "édifice", "banco", "terre", "paille"
-        ]
-        
-        # Déterminer les catégories à privilégier
-        prefer_culture = any(kw in query_lower for kw in cultural_keywords)
-        prefer_architecture = any(kw in query_lower for kw in architectural_keywords)
+        # Indexation encore en cours (démarrage à froid) : répondre sans
+        # contexte plutôt que de bloquer la requête plusieurs minutes
+        if not self._indexing_done.is_set():
+            print("⏳ Indexation en cours, recherche ignorée")
+            return []
+
+        # Détection intelligente de catégorie — réutiliser la
+        # classification de l'appelant, ou la calculer en une passe
+        if classification is None:
+            classification = self._classify_query(query)
+        prefer_culture = classification["prefer_culture"]
+        prefer_architecture = classification["prefer_architecture"]
         
         # Récupérer plus de résultats pour filtrer ensuite
         n_fetch = n_results * 3 if (prefer_culture or prefer_architecture) else n_results
@@ -270,51 +858,33 @@ class BurkinaHeritageRAGSimple:
             n_results=min(n_fetch, 15)  # Maximum 15 pour performance
         )
         
-        documents = []
-        for i in range(len(results['documents'][0])):
-            doc = {
-                "content": results['documents'][0][i],
-                "metadata": results['metadatas'][0][i]
-            }
-            
-            # Filtrage intelligent par catégorie
-            category = doc['metadata'].get('category', '')
-            
-            # Si on cherche de la culture, on exclut l'architecture
-            if prefer_culture and not prefer_architecture:
-                if category == 'architecture':
-                    continue
-            
-            documents.append(doc)
-            
-            # Arrêter quand on a assez de résultats
-            if len(documents) >= n_results:
-                break
-        
-        return documents[:n_results]
+        contents = results['documents'][0]
+        metadatas = results['metadatas'][0]
+
+        # Filtrage par catégorie vectorisé : masque booléen numpy puis
+        # sélection d'indices, au lieu d'une boucle Python par document.
+        # Si on cherche de la culture, on exclut l'architecture.
+        if prefer_culture and not prefer_architecture:
+            categories = np.array([m.get('category', '') for m in metadatas])
+            keep = np.flatnonzero(categories != 'architecture')[:n_results]
+        else:
+            keep = range(min(len(contents), n_results))
+
+        return [
+            {"content": contents[i], "metadata": metadatas[i]}
+            for i in keep
+        ]
     
-    def generate_answer_hf(self, question: str, context_docs: List[Dict], conversation_history: List[Dict] = None) -> str:
+    def _build_prompt(self, question: str, context_docs: List[Dict], conversation_history: List[Dict]) -> tuple:
         """
-        Génère une réponse intelligente avec Gemini.
-        
-        Stratégie hybride intelligente :
-        - Si contexte trouvé : Gemini reformule + peut compléter/corriger
-        - Si pas de contexte : Gemini répond avec ses propres connaissances
-        
-        Args:
-            question (str): Question de l'utilisateur
-            context_docs (List[Dict]): Documents de contexte (peut être vide)
-            conversation_history (List[Dict]): Historique de la conversation
-            
+        Construit le prompt Gemini (partie dynamique, hors préambule).
+
         Returns:
-            str: Réponse générée par Gemini
+            tuple: (prompt, has_context)
         """
-        if conversation_history is None:
-            conversation_history = []
-            
         # Vérifier si on a du contexte pertinent
         has_context = len(context_docs) > 0
-        
+
         # Construire l'historique pour le prompt (derniers 6 messages max)
         history_text = ""
         if conversation_history and len(conversation_history) > 1:  # Au moins 2 messages (user + assistant)
@@ -328,118 +898,167 @@ class BurkinaHeritageRAGSimple:
                 history_text = "\n".join(history_lines)
         
         if has_context:
-            # Construire le contexte depuis la BD
+            # Construire le contexte depuis la BD (extrait "preview"
+            # pré-tronqué à l'indexation ; slice de secours pour les
+            # collections indexées avant ce champ)
             context = "\n\n".join([
-                f"Document {i+1}:\n{doc['content'][:500]}"
+                f"Document {i+1}:\n{doc['metadata'].get('preview') or doc['content'][:500]}"
                 for i, doc in enumerate(context_docs[:3])
             ])
             
             # PROMPT HYBRIDE : Reformuler + Compléter/Corriger AVEC HISTORIQUE
+            # (le préambule "Tu es..." part en system_instruction ;
+            # segments statiques précompilés au niveau module)
             if history_text:
-                prompt = f"""Tu es un assistant expert sur le Burkina Faso (culture, histoire, traditions).
-
-HISTORIQUE DE LA CONVERSATION :
-{history_text}
-
-CONTEXTE TROUVÉ DANS MA BASE DE DONNÉES :
-{context}
-
-QUESTION DE L'UTILISATEUR : {question}
+                head, mid, tail, fin = _PROMPT_CTX_HIST
+                prompt = "".join((head, history_text, mid, context, tail, question, fin))
+            else:
+                head, mid, fin = _PROMPT_CTX
+                prompt = "".join((head, context, mid, question, fin))
+        else:
+            # PAS DE CONTEXTE : Gemini répond en mode conversationnel AVEC HISTORIQUE
+            if history_text:
+                head, mid, fin = _PROMPT_HIST
+                prompt = "".join((head, history_text, mid, question, fin))
+            else:
+                head, fin = _PROMPT_PLAIN
+                prompt = "".join((head, question, fin))
 
-TA MISSION :
-1. TIENS COMPTE de l'historique de conversation ci-dessus pour comprendre le contexte
-2. Utilise les informations du contexte de ma base de données comme BASE
-3. Reformule de manière claire et fluide (pas de copier-coller)
-4. Tu peux COMPLÉTER avec tes propres connaissances si nécessaire
-5. Si la question fait référence à quelque chose dans l'historique (comme "elle", "il", "le SIAO", etc.), utilise cet historique
-6. Réponds de manière naturelle et informative (2-4 phrases)
+        return prompt, has_context
 
-IMPORTANT : Réponds de façon cohérente avec la conversation précédente.
+    def generate_answer_hf(self, question: str, context_docs: List[Dict], conversation_history: List[Dict] = None, session_id: str = None) -> str:
+        """
+        Génère une réponse intelligente avec Gemini.
 
-RÉPONSE (en français, naturelle et complète) :"""
-            else:
-                prompt = f"""Tu es un assistant expert sur le Burkina Faso (culture, histoire, traditions).
+        Stratégie hybride intelligente :
+        - Si contexte trouvé : Gemini reformule + peut compléter/corriger
+        - Si pas de contexte : Gemini répond avec ses propres connaissances
 
-CONTEXTE TROUVÉ DANS MA BASE DE DONNÉES :
-{context}
+        Args:
+            question (str): Question de l'utilisateur
+            context_docs (List[Dict]): Documents de contexte (peut être vide)
+            conversation_history (List[Dict]): Historique de la conversation
+            session_id (str): Si fourni, la conversation passe par une
+                session de chat Gemini (seul le tour delta est envoyé)
 
-QUESTION DE L'UTILISATEUR : {question}
+        Returns:
+            str: Réponse générée par Gemini
+        """
+        return self._generate_answer(question, context_docs, conversation_history, session_id)[0]
 
-TA MISSION :
-1. Utilise les informations du contexte ci-dessus comme BASE
-2. Reformule de manière claire et fluide (pas de copier-coller)
-3. Tu peux COMPLÉTER avec tes propres connaissances si nécessaire
-4. Tu peux CORRIGER si une information semble incorrecte
-5. Réponds de manière naturelle et informative (2-4 phrases)
+    def _generate_answer(self, question: str, context_docs: List[Dict], conversation_history: List[Dict] = None, session_id: str = None) -> tuple:
+        """
+        Génère la réponse et indique si elle vient vraiment de Gemini.
 
-IMPORTANT : Même si le contexte ne répond pas parfaitement, utilise tes connaissances du Burkina Faso pour donner une réponse complète et utile.
+        Returns:
+            tuple: (réponse, True si générée par Gemini — False pour les
+                messages d'erreur et les réponses de repli, que les
+                caches ne doivent pas mémoriser)
+        """
+        if conversation_history is None:
+            conversation_history = []
 
-RÉPONSE (en français, naturelle et complète) :"""
-        else:
-            # PAS DE CONTEXTE : Gemini répond en mode conversationnel AVEC HISTORIQUE
-            if history_text:
-                prompt = f"""Tu es BurkinaHeritage, un assistant sympathique et expert sur le Burkina Faso.
+        prompt, has_context = self._build_prompt(question, context_docs, conversation_history)
 
-HISTORIQUE DE LA CONVERSATION :
-{history_text}
+        # Méthode 1: GEMINI API (PRIORITÉ)
+        gemini_error_message = None
+        if self.gemini_client:
+            try:
+                if session_id:
+                    # Tour delta : l'historique est déjà côté Gemini dans
+                    # la session, seuls la question et ses documents partent
+                    delta_prompt, _ = self._build_prompt(question, context_docs, [])
+                    try:
+                        chat = self._get_chat_session(session_id, conversation_history)
+                        response = chat.send_message(delta_prompt)
+                    except Exception as chat_error:
+                        # Session inutilisable (expirée, état perdu) :
+                        # l'oublier et retomber sur l'appel sans état avec
+                        # l'historique complet dans le prompt
+                        print(f"⚠️  Session de chat indisponible: {chat_error}")
+                        self._chat_sessions.pop((session_id, "sync"), None)
+                        response = self._gemini_generate(prompt)
+                else:
+                    response = self._gemini_generate(prompt)
+                answer = response.text.strip()
+                if answer and len(answer) > 30:
+                    context_status = "avec contexte BD" if has_context else "sans contexte (Gemini pur)"
+                    print(f"✅ Réponse générée par Gemini ({context_status})")
+                    return answer, True
+            except Exception as e:
+                print(f"⚠️  Erreur Gemini API: {e}")
+                gemini_error_message = self._gemini_error_message(str(e))
 
-QUESTION : {question}
+        return self._generate_fallback(question, context_docs, has_context, gemini_error_message), False
 
-TA MISSION :
-- TIENS COMPTE de l'historique pour comprendre le contexte
-- Si la question fait référence à la conversation précédente, utilise cet historique
-- Si c'est une salutation → réponds chaleureusement
-- Si c'est une question sur le Burkina Faso → réponds avec tes connaissances
-- Reste naturel, sympathique et cohérent avec la conversation
-- Réponds en français (1-3 phrases)
+    async def generate_answer_hf_async(self, question: str, context_docs: List[Dict], conversation_history: List[Dict] = None, session_id: str = None) -> str:
+        """
+        Variante asynchrone de generate_answer_hf pour le serveur FastAPI.
 
-RÉPONSE (naturelle, sympathique et cohérente) :"""
-            else:
-                prompt = f"""Tu es BurkinaHeritage, un assistant sympathique et expert sur le Burkina Faso.
+        L'appel Gemini passe par le client aio (l'event loop reste libre
+        pendant l'attente réseau) ; les chemins de repli, qui font des
+        requêtes ChromaDB synchrones, sont déportés dans un thread.
+        """
+        answer, _ = await self._generate_answer_async(question, context_docs, conversation_history, session_id)
+        return answer
 
-QUESTION : {question}
+    async def _generate_answer_async(self, question: str, context_docs: List[Dict], conversation_history: List[Dict] = None, session_id: str = None) -> tuple:
+        """
+        Jumeau asynchrone de _generate_answer.
 
-CONTEXTE : C'est une question conversationnelle ou aucune donnée spécifique n'est nécessaire.
+        Returns:
+            tuple: (réponse, True si générée par Gemini)
+        """
+        if conversation_history is None:
+            conversation_history = []
 
-TA MISSION :
-- Si c'est une salutation (bonjour, salut, etc.) → réponds chaleureusement et brièvement
-- Si c'est une question sur toi → explique que tu es un assistant sur le Burkina Faso
-- Si c'est une question sur le Burkina Faso → réponds avec tes connaissances
-- Reste naturel, sympathique et concis (1-3 phrases)
-- Réponds en français
+        prompt, has_context = self._build_prompt(question, context_docs, conversation_history)
 
-RÉPONSE (naturelle et sympathique) :"""
-        
-        # Méthode 1: GEMINI API (PRIORITÉ)
         gemini_error_message = None
         if self.gemini_client:
             try:
-                response = self.gemini_client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=prompt
-                )
+                if session_id:
+                    # Tour delta via la session de chat aio (voir
+                    # _generate_answer)
+                    delta_prompt, _ = self._build_prompt(question, context_docs, [])
+                    try:
+                        chat = self._get_chat_session(session_id, conversation_history, aio=True)
+                        response = await chat.send_message(delta_prompt)
+                    except Exception as chat_error:
+                        print(f"⚠️  Session de chat indisponible: {chat_error}")
+                        self._chat_sessions.pop((session_id, "aio"), None)
+                        response = await self._gemini_generate_async(prompt)
+                else:
+                    response = await self._gemini_generate_async(prompt)
                 answer = response.text.strip()
                 if answer and len(answer) > 30:
                     context_status = "avec contexte BD" if has_context else "sans contexte (Gemini pur)"
                     print(f"✅ Réponse générée par Gemini ({context_status})")
-                    return answer
+                    return answer, True
             except Exception as e:
-                error_str = str(e)
                 print(f"⚠️  Erreur Gemini API: {e}")
-                
-                # Déterminer le type d'erreur et créer un message approprié
-                if "503" in error_str or "overloaded" in error_str.lower():
-                    gemini_error_message = "⚠️ Le service d'IA est temporairement surchargé. Veuillez réessayer dans quelques instants."
-                elif "429" in error_str or "quota" in error_str.lower() or "rate" in error_str.lower():
-                    gemini_error_message = "⚠️ Limite d'utilisation atteinte. Veuillez réessayer dans quelques minutes."
-                elif "401" in error_str or "unauthorized" in error_str.lower() or "api key" in error_str.lower():
-                    gemini_error_message = "⚠️ Problème de configuration de l'API. Veuillez contacter l'administrateur."
-                elif "network" in error_str.lower() or "connection" in error_str.lower():
-                    gemini_error_message = "⚠️ Problème de connexion réseau. Veuillez vérifier votre connexion internet et réessayer."
-                else:
-                    gemini_error_message = "⚠️ Le service d'IA est temporairement indisponible. Veuillez réessayer ultérieurement."
-        
-        # Fallback si Gemini échoue
+                gemini_error_message = self._gemini_error_message(str(e))
+
+        fallback = await asyncio.to_thread(
+            self._generate_fallback, question, context_docs, has_context, gemini_error_message
+        )
+        return fallback, False
+
+    @staticmethod
+    def _gemini_error_message(error_str: str) -> str:
+        """Traduit une erreur Gemini en message utilisateur approprié"""
+        if "503" in error_str or "overloaded" in error_str.lower():
+            return "⚠️ Le service d'IA est temporairement surchargé. Veuillez réessayer dans quelques instants."
+        elif "429" in error_str or "quota" in error_str.lower() or "rate" in error_str.lower():
+            return "⚠️ Limite d'utilisation atteinte. Veuillez réessayer dans quelques minutes."
+        elif "401" in error_str or "unauthorized" in error_str.lower() or "api key" in error_str.lower():
+            return "⚠️ Problème de configuration de l'API. Veuillez contacter l'administrateur."
+        elif "network" in error_str.lower() or "connection" in error_str.lower():
+            return "⚠️ Problème de connexion réseau. Veuillez vérifier votre connexion internet et réessayer."
+        return "⚠️ Le service d'IA est temporairement indisponible. Veuillez réessayer ultérieurement."
+
+    def _generate_fallback(self, question: str, context_docs: List[Dict], has_context: bool, gemini_error_message: str = None) -> str:
+        """Réponse de repli quand Gemini est absent ou a échoué"""
         if has_context:
             # Si on a du contexte mais Gemini a échoué, utiliser le fallback intelligent
             print("⚠️  Utilisation du fallback avec contexte")
@@ -459,21 +1078,28 @@ RÉPONSE (naturelle et sympathique) :"""
                 "patrimoine burkinabè"
             ]
             
+            # Une seule requête multi-textes : les 3 termes sont encodés
+            # en batch et interrogés en un aller-retour ChromaDB
             expanded_docs = []
-            for term in general_terms:
-                try:
-                    results = self.collection.query(
-                        query_texts=[term],
-                        n_results=3
-                    )
-                    if results and results['documents'] and results['documents'][0]:
-                        for i in range(len(results['documents'][0])):
-                            expanded_docs.append({
-                                "content": results['documents'][0][i],
-                                "metadata": results['metadatas'][0][i]
-                            })
-                except Exception as e:
-                    continue
+            try:
+                results = self.collection.query(
+                    query_texts=general_terms,
+                    n_results=3
+                )
+                seen_titles = set()
+                for qi in range(len(results['documents'])):
+                    for di in range(len(results['documents'][qi])):
+                        metadata = results['metadatas'][qi][di]
+                        title = metadata.get('title', '')
+                        if title in seen_titles:
+                            continue
+                        seen_titles.add(title)
+                        expanded_docs.append({
+                            "content": results['documents'][qi][di],
+                            "metadata": metadata
+                        })
+            except Exception:
+                pass
             
             if expanded_docs:
                 print(f"✅ Trouvé {len(expanded_docs)} documents généraux")
@@ -487,6 +1113,39 @@ RÉPONSE (naturelle et sympathique) :"""
                 error_prefix = f"{gemini_error_message}\n\n" if gemini_error_message else ""
                 return f"{error_prefix}Désolé, je n'ai pas d'information sur ce sujet dans ma base de données. Posez-moi des questions sur la culture, l'histoire, les traditions, l'artisanat ou l'architecture du Burkina Faso. Par exemple : 'Qu'est-ce que le SIAO ?', 'Parle-moi du FESPACO', 'Qui est Thomas Sankara ?'"
     
+    def generate_answer_hf_stream(self, question: str, context_docs: List[Dict], conversation_history: List[Dict] = None):
+        """
+        Version streaming de generate_answer_hf : génère les morceaux de
+        texte au fil de l'eau (pour SSE côté API).
+
+        En cas d'échec du streaming Gemini, la réponse complète des
+        chemins de repli est produite en un seul morceau.
+
+        Yields:
+            str: Fragments successifs de la réponse
+        """
+        if conversation_history is None:
+            conversation_history = []
+
+        if self.gemini_client:
+            prompt, has_context = self._build_prompt(question, context_docs, conversation_history)
+            try:
+                produced = False
+                for chunk in self._gemini_generate_stream(prompt):
+                    text = getattr(chunk, "text", None)
+                    if text:
+                        produced = True
+                        yield text
+                if produced:
+                    context_status = "avec contexte BD" if has_context else "sans contexte (Gemini pur)"
+                    print(f"✅ Réponse streamée par Gemini ({context_status})")
+                    return
+            except Exception as e:
+                print(f"⚠️  Erreur Gemini API (stream): {e}")
+
+        # Repli : générer la réponse complète d'un coup
+        yield self.generate_answer_hf(question, context_docs, conversation_history)
+
     def _fallback_answer(self, context_docs: List[Dict], question: str = "") -> str:
         """
         Génère une réponse reformulée basée sur le contexte (sans LLM externe).
@@ -532,8 +1191,7 @@ RÉPONSE (naturelle et sympathique) :"""
                 continue
             
             # Diviser en phrases (gérer plusieurs délimiteurs)
-            import re
-            sentences = re.split(r'[.!?]\s+', content)
+            sentences = _SENT_RE.split(content)
             
             # Ajouter les phrases les plus pertinentes
             for sentence in sentences:
@@ -591,30 +1249,9 @@ RÉPONSE (naturelle et sympathique) :"""
         Returns:
             bool: True si recherche BD nécessaire, False sinon
         """
-        question_lower = question.lower().strip()
-        
-        # Mots-clés qui indiquent un besoin de recherche documentaire
-        keywords_requiring_search = [
-            # Culture
-            "griot", "balafon", "djembé", "kora", "musique", "danse", "tradition",
-            "masque", "fespaco", "siao", "artisan", "tissage", "poterie", "bronze",
-            "cérémonie", "rite", "ancêtre", "chef", "roi", "royaume", "ethnie",
-            "mossi", "peul", "bobo", "lobi", "gourounsi", "touareg",
-            # Architecture
-            "grenier", "case", "maison", "habitat", "construction", "architecture",
-            "mosquée", "bâtiment", "édifice", "banco", "terre", "paille",
-            # Histoire
-            "histoire", "indépendance", "thomas sankara", "sankara", "mogho naba",
-            "empire", "colonial", "français", "guerre",
-            # Géographie/Lieux
-            "ouagadougou", "bobo-dioulasso", "banfora", "ville", "région",
-            # Questions explicites
-            "qui est", "qu'est-ce que", "c'est quoi", "parle-moi de",
-            "explique", "raconte", "définition", "signification"
-        ]
-        
-        # Si un mot-clé est détecté → recherche BD
-        return any(keyword in question_lower for keyword in keywords_requiring_search)
+        # Si un mot-clé est détecté → recherche BD (passe unique sur la
+        # question, mêmes listes que la détection de catégorie)
+        return self._classify_query(question)["needs_search"]
     
     def _simple_chat_response(self, question: str) -> str:
         """
@@ -627,41 +1264,14 @@ RÉPONSE (naturelle et sympathique) :"""
             str: Réponse conversationnelle
         """
         question_lower = question.lower().strip()
-        
-        # Salutations
-        greetings = ["bonjour", "bonsoir", "salut", "hello", "yo", "hey", "coucou"]
-        if any(greeting in question_lower for greeting in greetings):
-            return """Bonjour ! 👋
 
-Je suis BurkinaHeritage, votre assistant culturel sur le Burkina Faso.
+        # Un seul parcours des tokens : le premier déclencheur reconnu
+        # choisit la réponse (salutations, état, identité, capacités)
+        for token in question_lower.split():
+            intent = _CHAT_TRIGGERS.get(token.strip("?!.,"))
+            if intent:
+                return _CHAT_RESPONSES[intent]
 
-Posez-moi des questions sur la culture, l'histoire, les traditions, l'architecture... Je suis là pour vous aider ! 😊"""
-        
-        # Questions sur l'état
-        if any(q in question_lower for q in ["comment tu vas", "ça va", "comment allez-vous"]):
-            return "Je vais très bien, merci ! 😊 Prêt à répondre à vos questions sur le Burkina Faso !"
-        
-        # Questions sur l'identité
-        if any(q in question_lower for q in ["qui es-tu", "qui êtes-vous", "ton nom", "tu es qui"]):
-            return """Je suis **BurkinaHeritage**, un assistant culturel spécialisé dans le patrimoine du Burkina Faso. 🇧🇫
-
-Je dispose de 370 documents sur la culture, l'architecture, l'histoire et bien plus encore.
-
-Posez-moi des questions précises pour en savoir plus ! 📚"""
-        
-        # Questions sur les capacités
-        if any(q in question_lower for q in ["que sais-tu", "que connais-tu", "que peux-tu", "tu connais quoi"]):
-            return """Je connais beaucoup de choses sur le **Burkina Faso** ! 🇧🇫
-
-Mes domaines d'expertise :
-• 🎭 Culture (traditions, griots, musique, artisanat)
-• 🏛️ Architecture traditionnelle
-• 📚 Histoire et grands personnages
-• 🎬 Événements culturels (FESPACO, SIAO...)
-• 🌍 Patrimoine et société
-
-Posez-moi une question spécifique ! 😊"""
-        
         # Réponse par défaut pour conversation générale
         return """Je suis spécialisé dans le patrimoine du Burkina Faso. 
 
@@ -674,49 +1284,86 @@ Pour que je puisse vous aider au mieux, posez-moi une question précise sur :
 
 Que voulez-vous savoir ? 🤔"""
     
-    def ask(self, question: str, use_llm: bool = True, conversation_history: List[Dict] = None) -> Dict:
+    def _prepare_question(self, question: str, conversation_history: List[Dict], stream: bool):
         """
-        Point d'entrée principal : TOUT passe par Gemini.
-        
-        Pipeline ultra-intelligent :
-        1. Recherche dans la BD pour avoir du contexte
-        2. Gemini répond TOUJOURS (conversation + reformulation + complétion)
-        3. Sources affichées seulement si pertinentes
-        
-        Args:
-            question (str): Question de l'utilisateur
-            use_llm (bool): Toujours True (Gemini intelligent)
-            conversation_history (List[Dict]): Historique de la conversation
-            
+        Étapes communes avant génération : salutations, cache sémantique,
+        classification et recherche BD.
+
         Returns:
-            Dict: Dictionnaire contenant question, answer, sources
+            tuple: (résultat immédiat ou None, q_vec, docs, sources)
         """
-        if conversation_history is None:
-            conversation_history = []
-            
         print(f"\n❓ Question: {question}")
         if conversation_history:
             print(f"📜 Historique: {len(conversation_history)} messages")
-        
+
         # OPTIMISATION: Gérer les salutations et questions simples AVANT Gemini
         question_lower = question.lower().strip()
-        simple_greetings = ["bonjour", "salut", "bonsoir", "coucou", "hey", "hello", "hi"]
-        
-        if question_lower in simple_greetings or any(g == question_lower for g in simple_greetings):
+
+        if question_lower in _SIMPLE_GREETINGS:
             print("👋 Salutation détectée - Réponse directe")
-            return {
-                "question": question,
-                "answer": "Bonjour ! 👋 Je suis BurkinaHeritage, votre assistant culturel sur le Burkina Faso. Comment puis-je vous aider aujourd'hui ? 😊",
-                "sources": []
-            }
-        
-        # Déterminer si on recherche dans la BD
-        needs_db = self._needs_database_search(question)
-        
+            greeting_answer = "Bonjour ! 👋 Je suis BurkinaHeritage, votre assistant culturel sur le Burkina Faso. Comment puis-je vous aider aujourd'hui ? 😊"
+            if stream:
+                done = {"question": question, "answer_stream": iter([greeting_answer]), "sources": []}
+            else:
+                done = {
+                    "question": question,
+                    "answer": greeting_answer,
+                    "sources": [],
+                    "cacheable": True
+                }
+            return done, None, None, None
+
+        # Cache sémantique : réutiliser une réponse déjà générée pour une
+        # formulation proche (hors conversation suivie, dont la réponse
+        # dépend de l'historique — l'historique est normalisé d'abord,
+        # car le frontend y inclut toujours la question courante)
+        q_vec = None
+        if not prior_history(question, conversation_history):
+            # Palier 1 : correspondance exacte sur la question normalisée
+            # (aucun embedding à calculer)
+            exact = self._exact_cache_lookup(question_lower)
+            if exact is not None:
+                print("⚡ Réponse servie par le cache exact")
+                if stream:
+                    done = {
+                        "question": question,
+                        "answer_stream": iter([exact["answer"]]),
+                        "sources": exact["sources"]
+                    }
+                else:
+                    # Une entrée de cache est par construction une
+                    # réponse Gemini complète → recachable en amont
+                    done = {"question": question, **exact, "cacheable": True}
+                return done, None, None, None
+
+            # Palier 2 : cache sémantique (reformulations proches)
+            try:
+                q_vec = self._embed_question(question)
+                cached = self._qa_cache_lookup(q_vec)
+                if cached is not None:
+                    print("⚡ Réponse servie par le cache sémantique")
+                    if stream:
+                        done = {
+                            "question": question,
+                            "answer_stream": iter([cached["answer"]]),
+                            "sources": cached["sources"]
+                        }
+                    else:
+                        done = {"question": question, **cached, "cacheable": True}
+                    return done, None, None, None
+            except Exception as e:
+                print(f"⚠️  Cache sémantique indisponible: {e}")
+                q_vec = None
+
+        # Classifier la question une seule fois (recherche nécessaire ?
+        # catégories à privilégier ?) et transmettre le résultat
+        classification = self._classify_query(question)
+        needs_db = classification["needs_search"]
+
         if needs_db:
             # Question spécifique → rechercher dans la BD
             print("🔍 Recherche dans la base de données...")
-            docs = self.search_documents(question, n_results=5)
+            docs = self.search_documents(question, n_results=5, classification=classification)
             
             if docs:
                 print(f"✅ {len(docs)} documents trouvés")
@@ -727,10 +1374,6 @@ Que voulez-vous savoir ? 🤔"""
             print("💬 Question conversationnelle")
             docs = []
         
-        # GEMINI RÉPOND TOUJOURS (conversation + reformulation + complétion)
-        print("🤖 Gemini génère la réponse...")
-        answer = self.generate_answer_hf(question, docs, conversation_history)
-        
         # Sources (seulement si on a cherché dans la BD ET trouvé des docs)
         sources = []
         if needs_db and docs:
@@ -742,17 +1385,128 @@ Que voulez-vous savoir ? 🤔"""
                 }
                 for doc in docs[:3]
             ]
-        
+
+        return None, q_vec, docs, sources
+
+    def ask(self, question: str, use_llm: bool = True, conversation_history: List[Dict] = None, stream: bool = False, session_id: str = None) -> Dict:
+        """
+        Point d'entrée principal : TOUT passe par Gemini.
+
+        Pipeline ultra-intelligent :
+        1. Recherche dans la BD pour avoir du contexte
+        2. Gemini répond TOUJOURS (conversation + reformulation + complétion)
+        3. Sources affichées seulement si pertinentes
+
+        Args:
+            question (str): Question de l'utilisateur
+            use_llm (bool): Toujours True (Gemini intelligent)
+            conversation_history (List[Dict]): Historique de la conversation
+            stream (bool): Si True, le résultat contient "answer_stream"
+                (générateur de fragments pour SSE) à la place de "answer"
+            session_id (str): Identifiant de conversation — chaque tour
+                n'envoie à Gemini que le delta, l'historique reste côté API
+
+        Returns:
+            Dict: Dictionnaire contenant question, answer (ou
+                answer_stream en mode streaming), sources
+        """
+        if conversation_history is None:
+            conversation_history = []
+
+        done, q_vec, docs, sources = self._prepare_question(question, conversation_history, stream)
+        if done is not None:
+            return done
+
+        # Mode streaming : forwarder le générateur Gemini, les sources
+        # sont émises en dernier fragment (pas de mise en cache)
+        if stream:
+            print("🤖 Gemini streame la réponse...")
+
+            def _answer_stream():
+                for piece in self.generate_answer_hf_stream(question, docs, conversation_history):
+                    yield piece
+                if sources:
+                    source_lines = "\n".join(f"- {s['source']}" for s in sources)
+                    yield f"\n\n\n📚 Sources :\n\n{source_lines}"
+
+            return {
+                "question": question,
+                "answer_stream": _answer_stream(),
+                "sources": sources
+            }
+
+        # GEMINI RÉPOND TOUJOURS (conversation + reformulation + complétion)
+        print("🤖 Gemini génère la réponse...")
+        answer, llm_ok = self._generate_answer(question, docs, conversation_history, session_id=session_id)
+
         # Ajouter les sources APRÈS la réponse (seulement si pertinentes)
         answer_with_sources = answer.strip()
         if sources:
             source_lines = "\n".join([f"- {s['source']}" for s in sources])
             answer_with_sources = f"{answer_with_sources}\n\n\n📚 Sources :\n\n{source_lines}"
 
+        # Mémoriser la paire question/réponse pour les reformulations
+        # futures — seulement les vraies réponses Gemini, et pas pendant
+        # l'indexation de démarrage : un message d'erreur transitoire ou
+        # une réponse sans contexte serait figé (et persisté via
+        # qa_cache.npz) pour toutes les formulations proches
+        cacheable = llm_ok and self._indexing_done.is_set()
+        if q_vec is not None and cacheable:
+            result = {"answer": answer_with_sources, "sources": sources}
+            self._qa_cache_store(q_vec, question, result)
+            self._exact_cache_store(question.lower().strip(), result)
+
+        return {
+            "question": question,
+            "answer": answer_with_sources,
+            "sources": sources,
+            # Transmis à la couche API pour qu'elle applique les mêmes
+            # règles à son cache TTL (jamais renvoyé au client)
+            "cacheable": cacheable
+        }
+
+    async def ask_async(self, question: str, use_llm: bool = True, conversation_history: List[Dict] = None, session_id: str = None) -> Dict:
+        """
+        Variante asynchrone de ask() pour le serveur FastAPI.
+
+        Les étapes synchrones (cache, embeddings, recherche ChromaDB)
+        partent dans un thread ; l'appel Gemini utilise le client aio,
+        donc son attente réseau de 1-2 s ne monopolise ni l'event loop
+        ni un thread du pool.
+
+        Returns:
+            Dict: Dictionnaire contenant question, answer, sources
+        """
+        if conversation_history is None:
+            conversation_history = []
+
+        done, q_vec, docs, sources = await asyncio.to_thread(
+            self._prepare_question, question, conversation_history, False
+        )
+        if done is not None:
+            return done
+
+        print("🤖 Gemini génère la réponse...")
+        answer, llm_ok = await self._generate_answer_async(question, docs, conversation_history, session_id=session_id)
+
+        answer_with_sources = answer.strip()
+        if sources:
+            source_lines = "\n".join([f"- {s['source']}" for s in sources])
+            answer_with_sources = f"{answer_with_sources}\n\n\n📚 Sources :\n\n{source_lines}"
+
+        # Mêmes conditions que ask() : ni réponse de repli/erreur, ni
+        # réponse produite pendant l'indexation de démarrage
+        cacheable = llm_ok and self._indexing_done.is_set()
+        if q_vec is not None and cacheable:
+            result = {"answer": answer_with_sources, "sources": sources}
+            self._qa_cache_store(q_vec, question, result)
+            self._exact_cache_store(question.lower().strip(), result)
+
         return {
             "question": question,
             "answer": answer_with_sources,
-            "sources": sources
+            "sources": sources,
+            "cacheable": cacheable
         }
 
 
@@ -21,6 +21,15 @@ except ImportError:
     import chromadb
     from chromadb.config import Settings
 
+from embedding_cache import get_or_compute
+from embeddings import get_embedding_function
+
+# orjson (parseur Rust) est optionnel, fallback sur json standard
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class DatabaseRebuilder:
     """Reconstruit la base de données ChromaDB"""
@@ -29,7 +38,10 @@ class DatabaseRebuilder:
         self.corpus_file = Path(corpus_file)
         self.db_path = Path(db_path)
         
-        self.corpus = []
+        # Corpus en colonnes (une liste par champ), prêt pour ChromaDB
+        self.ids = []
+        self.texts = []
+        self.metas = []
         self.stats = {
             "total_documents": 0,
             "successfully_added": 0,
@@ -37,24 +49,61 @@ class DatabaseRebuilder:
         }
     
     def load_corpus(self) -> bool:
-        """Charge le corpus depuis le fichier JSON"""
+        """Charge le corpus (JSONL en flux si présent, sinon JSON liste)"""
         print("📖 Chargement du corpus...")
-        
-        if not self.corpus_file.exists():
+
+        # Le scraper fusionne en JSONL (append) : préférer le fichier le
+        # plus récent des deux formats
+        jsonl_file = self.corpus_file.with_suffix('.jsonl')
+        use_jsonl = jsonl_file.exists() and (
+            not self.corpus_file.exists()
+            or jsonl_file.stat().st_mtime >= self.corpus_file.stat().st_mtime
+        )
+
+        if not use_jsonl and not self.corpus_file.exists():
             print(f"❌ Fichier corpus introuvable: {self.corpus_file}")
             return False
-        
+
         try:
-            with open(self.corpus_file, 'r', encoding='utf-8') as f:
-                self.corpus = json.load(f)
-            
-            print(f"✅ Corpus chargé: {len(self.corpus)} documents")
-            self.stats["total_documents"] = len(self.corpus)
+            loads = orjson.loads if orjson is not None else json.loads
+            if use_jsonl:
+                # Une ligne = un document : chaque dict parsé est
+                # converti en colonnes puis relâché — seules les colonnes
+                # résident en mémoire, jamais l'arbre JSON complet
+                with open(jsonl_file, 'rb') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        self._append_doc(loads(line))
+            else:
+                # Ancien format liste : l'arbre complet est matérialisé
+                # le temps de la conversion en colonnes
+                if orjson is not None:
+                    corpus = orjson.loads(self.corpus_file.read_bytes())
+                else:
+                    with open(self.corpus_file, 'r', encoding='utf-8') as f:
+                        corpus = json.load(f)
+                for doc in corpus:
+                    self._append_doc(doc)
+
+            print(f"✅ Corpus chargé: {len(self.ids)} documents")
+            self.stats["total_documents"] = len(self.ids)
             return True
-            
+
         except Exception as e:
             print(f"❌ Erreur lors du chargement: {e}")
             return False
+
+    def _append_doc(self, doc: dict):
+        """Ajoute un document aux colonnes ids/texts/metas"""
+        self.ids.append(str(doc['id']))
+        self.texts.append(doc['content'])
+        self.metas.append({
+            "title": doc.get('title', ''),
+            "source": doc.get('source', ''),
+            "category": doc.get('category', ''),
+            "word_count": str(doc.get('word_count', 0))
+        })
     
     def backup_existing_db(self):
         """Sauvegarde l'ancienne base de données"""
@@ -108,44 +157,36 @@ class DatabaseRebuilder:
             )
             
             print(f"✅ Collection '{collection_name}' créée")
-            
-            # Ajouter les documents par lots
-            batch_size = 100
-            total_batches = (len(self.corpus) + batch_size - 1) // batch_size
-            
-            print(f"\n📝 Ajout des documents ({total_batches} lots de {batch_size})...")
-            
-            for i in range(0, len(self.corpus), batch_size):
-                batch = self.corpus[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                
-                # Préparer les données pour ChromaDB
-                ids = [str(doc['id']) for doc in batch]
-                documents = [doc['content'] for doc in batch]
-                metadatas = [
-                    {
-                        "title": doc.get('title', ''),
-                        "source": doc.get('source', ''),
-                        "category": doc.get('category', ''),
-                        "word_count": str(doc.get('word_count', 0))
-                    }
-                    for doc in batch
-                ]
-                
-                try:
-                    # Ajouter le lot à la collection
-                    collection.add(
-                        ids=ids,
-                        documents=documents,
-                        metadatas=metadatas
-                    )
-                    
-                    self.stats["successfully_added"] += len(batch)
-                    print(f"  ✅ Lot {batch_num}/{total_batches} ajouté ({len(batch)} documents)")
-                    
-                except Exception as e:
-                    print(f"  ❌ Erreur lot {batch_num}: {e}")
-                    self.stats["errors"] += 1
+
+            # Précalculer tous les embeddings en un seul passage batché :
+            # l'encodeur amortit tokenisation et chargement du modèle sur
+            # tout le corpus au lieu de ré-entrer lot de 100 par lot de 100.
+            # Le cache par hash de contenu évite de ré-encoder les
+            # documents inchangés d'une reconstruction à l'autre
+            print("🧮 Calcul des embeddings du corpus (cache + passage unique)...")
+            embedding_function = get_embedding_function()
+            all_embeddings = get_or_compute(
+                self.texts,
+                embedding_function,
+                self.corpus_file.parent / "embedding_cache.npz"
+            )
+
+            # Insérer tout le corpus en un seul appel : une transaction
+            # SQLite et le chemin de chargement en masse du HNSW, au lieu
+            # d'une transaction par lot de 100
+            print(f"\n📝 Ajout des documents ({len(self.ids)} en un seul appel)...")
+
+            try:
+                collection.upsert(
+                    ids=self.ids,
+                    documents=self.texts,
+                    metadatas=self.metas,
+                    embeddings=all_embeddings.tolist()
+                )
+                self.stats["successfully_added"] = len(self.ids)
+            except Exception as e:
+                print(f"  ❌ Erreur lors de l'insertion: {e}")
+                self.stats["errors"] += 1
             
             print(f"\n✅ Base de données créée avec succès!")
             print(f"   📊 {self.stats['successfully_added']} documents ajoutés")
@@ -174,34 +215,41 @@ class DatabaseRebuilder:
         print("=" * 60 + "\n")
 
 
-def main():
-    """Point d'entrée principal"""
+def main(confirm: bool = True):
+    """
+    Point d'entrée principal.
+
+    Args:
+        confirm (bool): Demander la confirmation interactive avant de
+            recréer la BD (False quand un orchestrateur a déjà confirmé)
+    """
     print("\n" + "=" * 60)
     print("🇧🇫 BurkinaHeritage - Reconstruction de la Base de Données")
     print("=" * 60 + "\n")
-    
+
     # Créer le reconstructeur
     rebuilder = DatabaseRebuilder(
         corpus_file="data/corpus.json",
         db_path="data/chroma_db"
     )
-    
+
     # Charger le corpus
     if not rebuilder.load_corpus():
         print("\n❌ Impossible de continuer sans corpus!")
         return
-    
+
     # Demander confirmation
-    print("\n⚠️  ATTENTION:")
-    print("   Cette opération va RECRÉER complètement la base de données.")
-    print("   L'ancienne BD sera sauvegardée puis supprimée.")
-    
-    response = input("\n   Continuer ? (oui/non): ").strip().lower()
-    
-    if response not in ['oui', 'yes', 'o', 'y']:
-        print("\n❌ Opération annulée.")
-        return
-    
+    if confirm:
+        print("\n⚠️  ATTENTION:")
+        print("   Cette opération va RECRÉER complètement la base de données.")
+        print("   L'ancienne BD sera sauvegardée puis supprimée.")
+
+        response = input("\n   Continuer ? (oui/non): ").strip().lower()
+
+        if response not in ['oui', 'yes', 'o', 'y']:
+            print("\n❌ Opération annulée.")
+            return
+
     print()
     
     # Sauvegarder l'ancienne BD
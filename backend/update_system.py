@@ -8,8 +8,8 @@ Script principal pour mettre à jour complètement le système BurkinaHeritage
 Usage: python update_system.py [--no-scraping]
 """
 
+import os
 import sys
-import subprocess
 from pathlib import Path
 from datetime import datetime
 
@@ -31,90 +31,68 @@ class SystemUpdater:
         print(f"  {text}")
         print("=" * 70 + "\n")
     
-    def run_script(self, script_name: str, description: str) -> bool:
-        """Exécute un script Python"""
-        print(f"▶️  {description}...")
-        print(f"   Script: {script_name}\n")
-        
-        script_path = self.backend_dir / script_name
-        
-        if not script_path.exists():
-            print(f"❌ Script introuvable: {script_path}")
-            return False
-        
+    def run_callable(self, step_fn, description: str) -> bool:
+        """
+        Exécute une étape en appelant directement sa fonction main().
+
+        Un seul interpréteur pour tout le pipeline : pas de démarrage
+        Python ni de ré-import de chromadb à chaque étape, et le modèle
+        d'embedding partagé reste chargé d'une étape à l'autre.
+        """
+        print(f"▶️  {description}...\n")
+
         try:
-            result = subprocess.run(
-                [sys.executable, str(script_path)],
-                cwd=str(self.backend_dir),
-                capture_output=False,
-                text=True
-            )
-            
-            if result.returncode == 0:
+            step_fn()
+            print(f"\n✅ {description} - TERMINÉ\n")
+            return True
+        except SystemExit as e:
+            if not e.code:
                 print(f"\n✅ {description} - TERMINÉ\n")
                 return True
-            else:
-                print(f"\n❌ {description} - ÉCHEC\n")
-                return False
-                
+            print(f"\n❌ {description} - ÉCHEC\n")
+            return False
         except Exception as e:
             print(f"\n❌ Erreur lors de l'exécution: {e}\n")
             return False
-    
+
     def step_1_prepare_csv(self) -> bool:
         """Étape 1: Préparer les données CSV"""
-        return self.run_script(
-            "prepare_data_csv.py",
+        from prepare_data_csv import DEFAULT_CSV_FILE, main as prepare_csv_main
+        # Passer le chemin explicitement : en in-process, l'étape ne doit
+        # pas relire sys.argv (elle y trouverait --no-scraping)
+        return self.run_callable(
+            lambda: prepare_csv_main(csv_file=DEFAULT_CSV_FILE),
             "Étape 1/4: Traitement des données CSV"
         )
-    
+
     def step_2_web_scraping(self) -> bool:
         """Étape 2: Web scraping (optionnel)"""
         if not self.enable_scraping:
             print("⏭️  Étape 2/4: Web scraping - IGNORÉ (désactivé)\n")
             return True
-        
+
         print("⚠️  Le web scraping peut prendre du temps et nécessite une connexion internet.")
         response = input("   Continuer avec le scraping ? (oui/non): ").strip().lower()
-        
+
         if response not in ['oui', 'yes', 'o', 'y']:
             print("⏭️  Web scraping ignoré.\n")
             return True
-        
-        return self.run_script(
-            "web_scraper.py",
+
+        from web_scraper import main as scraper_main
+        return self.run_callable(
+            scraper_main,
             "Étape 2/4: Web scraping des sources en ligne"
         )
-    
+
     def step_3_rebuild_database(self) -> bool:
         """Étape 3: Reconstruire la base de données"""
-        print("▶️  Étape 3/4: Reconstruction de la base de données...")
-        print("   Script: rebuild_database.py\n")
-        
-        # Le script rebuild_database.py demande une confirmation
-        # On utilise subprocess.Popen pour pouvoir interagir
-        script_path = self.backend_dir / "rebuild_database.py"
-        
-        if not script_path.exists():
-            print(f"❌ Script introuvable: {script_path}")
-            return False
-        
-        try:
-            result = subprocess.run(
-                [sys.executable, str(script_path)],
-                cwd=str(self.backend_dir)
-            )
-            
-            if result.returncode == 0:
-                print(f"\n✅ Reconstruction de la BD - TERMINÉ\n")
-                return True
-            else:
-                print(f"\n❌ Reconstruction de la BD - ÉCHEC\n")
-                return False
-                
-        except Exception as e:
-            print(f"\n❌ Erreur: {e}\n")
-            return False
+        from rebuild_database import main as rebuild_main
+        # confirm=False : la mise à jour complète a déjà été confirmée
+        # au lancement, inutile de redemander
+        return self.run_callable(
+            lambda: rebuild_main(confirm=False),
+            "Étape 3/4: Reconstruction de la base de données"
+        )
     
     def step_4_verify_system(self) -> bool:
         """Étape 4: Vérifier le système"""
@@ -157,6 +135,10 @@ class SystemUpdater:
         print(f"📅 Date: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
         print(f"📂 Répertoire: {self.backend_dir}")
         print(f"🌐 Web scraping: {'Activé' if self.enable_scraping else 'Désactivé'}")
+
+        # Les étapes utilisent des chemins relatifs (data/...) : se placer
+        # dans backend/ comme le faisaient les sous-processus
+        os.chdir(self.backend_dir)
         
         steps = [
             ("Traitement CSV", self.step_1_prepare_csv),
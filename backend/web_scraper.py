@@ -7,10 +7,14 @@ Usage: python web_scraper.py
 Output: data/scraped_data.json
 """
 
+import asyncio
+import hashlib
 import os
 import json
+import threading
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
@@ -18,12 +22,92 @@ from urllib.parse import urljoin, urlparse
 
 try:
     import requests
-    from bs4 import BeautifulSoup
+    from bs4 import BeautifulSoup, SoupStrainer
 except ImportError:
     print("⚠️  Installation des dépendances...")
     os.system("pip install requests beautifulsoup4")
     import requests
-    from bs4 import BeautifulSoup
+    from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml (parseur C, ~5-10x plus rapide que html.parser) est optionnel
+try:
+    import lxml  # noqa: F401
+    _BS_PARSER = 'lxml'
+except ImportError:
+    _BS_PARSER = 'html.parser'
+
+# Ne parser que les balises utiles : le strainer évite de construire
+# les nœuds du DOM qui seraient jetés de toute façon
+_CONTENT_STRAINER = SoupStrainer(['p', 'article', 'section', 'title'])
+
+# Motifs précompilés de clean_text (appelé pour chaque paragraphe)
+_RE_WS = re.compile(r'\s+')
+_RE_BRACKETS = re.compile(r'[\[\]\{\}]')
+
+# aiohttp est optionnel : avec lui, les URLs sont téléchargées en
+# parallèle (les hôtes indépendants se recouvrent) ; sans lui, le
+# scraping reste séquentiel avec requests
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# orjson (sérialiseur Rust) est optionnel, fallback sur json standard
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dump_json(data, path: Path):
+    """Écrit data en JSON indenté (orjson si présent, sinon stdlib)"""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _load_json(path: Path):
+    """Lit un fichier JSON (orjson si présent, sinon stdlib)"""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _dumps_line(doc: Dict) -> bytes:
+    """Sérialise un document en une ligne JSONL (bytes)"""
+    if orjson is not None:
+        return orjson.dumps(doc) + b'\n'
+    return json.dumps(doc, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def _simhash64(text: str) -> int:
+    """
+    Empreinte SimHash 64 bits d'un texte.
+
+    Deux textes quasi identiques (même page rescrapée, variante de
+    ponctuation) donnent des empreintes à quelques bits près : une
+    distance de Hamming ≤ 3 les identifie comme doublons sans comparer
+    les contenus ni calculer d'embeddings.
+    """
+    weights = [0] * 64
+    for token in text.lower().split():
+        h = int.from_bytes(
+            hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(),
+            'big'
+        )
+        for bit in range(64):
+            if (h >> bit) & 1:
+                weights[bit] += 1
+            else:
+                weights[bit] -= 1
+    fingerprint = 0
+    for bit in range(64):
+        if weights[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
 
 
 class WebScraper:
@@ -66,22 +150,44 @@ class WebScraper:
             "total_pages": 0,
             "total_paragraphs": 0,
             "total_words": 0,
+            "duplicates_skipped": 0,
+            "pages_unchanged": 0,
             "errors": 0
         }
+
+        # Validateurs HTTP (ETag / Last-Modified) des pages déjà vues :
+        # renvoyés en GET conditionnel, un 304 évite de retélécharger et
+        # reparser les pages inchangées (le cas courant entre deux scrapes)
+        self.scrape_meta = {}
+        meta_path = self.output_dir / "scrape_meta.json"
+        if meta_path.exists():
+            try:
+                self.scrape_meta = _load_json(meta_path)
+            except Exception as e:
+                print(f"⚠️  Validateurs HTTP illisibles, ignorés: {e}")
+
+        # Empreintes SimHash des chunks déjà connus (persistées entre
+        # scrapes) : les quasi-doublons sont écartés avant d'atteindre
+        # le corpus et la base vectorielle
+        self.seen_hashes = set()
+        seen_path = self.output_dir / "seen_hashes.json"
+        if seen_path.exists():
+            try:
+                self.seen_hashes = set(_load_json(seen_path))
+            except Exception as e:
+                print(f"⚠️  Empreintes de dédoublonnage illisibles, ignorées: {e}")
     
     def clean_text(self, text: str) -> str:
         """Nettoie le texte extrait"""
         if not text:
             return ""
-        # Supprimer les espaces multiples
-        text = re.sub(r'\s+', ' ', text)
-        # Supprimer les sauts de ligne multiples
-        text = re.sub(r'\n+', '\n', text)
+        # Supprimer les espaces multiples (\s+ couvre aussi les sauts de
+        # ligne : un seul passage suffit)
+        text = _RE_WS.sub(' ', text)
         # Supprimer les caractères spéciaux inutiles
-        text = re.sub(r'[\[\]\{\}]', '', text)
+        text = _RE_BRACKETS.sub('', text)
         # Trim
-        text = text.strip()
-        return text
+        return text.strip()
     
     def is_valid_text(self, text: str) -> bool:
         """Vérifie si le texte est valide"""
@@ -91,143 +197,381 @@ class WebScraper:
         words = text.split()
         return len(words) >= 20
     
+    def _parse_page(self, url: str, category: str, html: bytes) -> List[Dict]:
+        """Extrait les documents du HTML d'une page (partie CPU)"""
+        documents = []
+
+        # Parser le HTML (parseur lxml si présent, balises utiles seulement)
+        soup = BeautifulSoup(html, _BS_PARSER, parse_only=_CONTENT_STRAINER)
+
+        # Extraire le titre
+        title = soup.find('title')
+        page_title = title.get_text().strip() if title else urlparse(url).path
+
+        # Supprimer les scripts, styles, etc. restés dans les sections
+        for script in soup(["script", "style", "nav", "footer", "header"]):
+            script.decompose()
+
+        # Extraire les paragraphes
+        paragraphs = soup.find_all(['p', 'article', 'section'])
+
+        for i, para in enumerate(paragraphs):
+            text = self.clean_text(para.get_text())
+
+            if self.is_valid_text(text):
+                # Limiter la longueur à 500 mots
+                words = text.split()
+                if len(words) > 500:
+                    # Découper en chunks
+                    chunks = [' '.join(words[i:i+500]) for i in range(0, len(words), 450)]
+                else:
+                    chunks = [text]
+
+                for chunk_idx, chunk in enumerate(chunks):
+                    # Écarter les quasi-doublons (page déjà scrapée,
+                    # paragraphe repris à l'identique ailleurs)
+                    fingerprint = _simhash64(chunk)
+                    if self._is_near_duplicate(fingerprint):
+                        self.stats["duplicates_skipped"] += 1
+                        continue
+                    self.seen_hashes.add(fingerprint)
+
+                    documents.append({
+                        "title": f"{page_title} - Partie {i+1}",
+                        "content": chunk,
+                        "source": url,
+                        "category": category,
+                        "scraped_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        "word_count": len(chunk.split()),
+                        "metadata": {
+                            "paragraph_index": i,
+                            "chunk_index": chunk_idx
+                        }
+                    })
+
+                    self.stats["total_paragraphs"] += 1
+                    self.stats["total_words"] += len(chunk.split())
+
+        self.visited_urls.add(url)
+        self.stats["total_pages"] += 1
+
+        print(f"    ✅ {len(documents)} documents extraits")
+
+        return documents
+
     def extract_text_from_url(self, url: str, category: str) -> List[Dict]:
         """Extrait le texte d'une URL"""
-        documents = []
-        
         if url in self.visited_urls:
             print(f"  ⏭️  Déjà visité: {url}")
-            return documents
-        
+            return []
+
         try:
             print(f"  🌐 Scraping: {url}")
-            
-            # Requête HTTP
-            response = requests.get(url, headers=self.headers, timeout=10)
+
+            # Requête HTTP (GET conditionnel si la page a déjà été vue)
+            response = requests.get(url, headers=self._request_headers(url), timeout=10)
+            if response.status_code == 304:
+                self._skip_unchanged(url)
+                return []
             response.raise_for_status()
-            
-            # Parser le HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extraire le titre
-            title = soup.find('title')
-            page_title = title.get_text().strip() if title else urlparse(url).path
-            
-            # Supprimer les scripts, styles, etc.
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            
-            # Extraire les paragraphes
-            paragraphs = soup.find_all(['p', 'article', 'section'])
-            
-            for i, para in enumerate(paragraphs):
-                text = self.clean_text(para.get_text())
-                
-                if self.is_valid_text(text):
-                    # Limiter la longueur à 500 mots
-                    words = text.split()
-                    if len(words) > 500:
-                        # Découper en chunks
-                        chunks = [' '.join(words[i:i+500]) for i in range(0, len(words), 450)]
-                    else:
-                        chunks = [text]
-                    
-                    for chunk_idx, chunk in enumerate(chunks):
-                        documents.append({
-                            "title": f"{page_title} - Partie {i+1}",
-                            "content": chunk,
-                            "source": url,
-                            "category": category,
-                            "scraped_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "word_count": len(chunk.split()),
-                            "metadata": {
-                                "paragraph_index": i,
-                                "chunk_index": chunk_idx
-                            }
-                        })
-                        
-                        self.stats["total_paragraphs"] += 1
-                        self.stats["total_words"] += len(chunk.split())
-            
-            self.visited_urls.add(url)
-            self.stats["total_pages"] += 1
-            
-            print(f"    ✅ {len(documents)} documents extraits")
-            
+            self._record_validators(url, response.headers)
+
+            return self._parse_page(url, category, response.content)
+
         except requests.RequestException as e:
             print(f"    ❌ Erreur réseau: {e}")
             self.stats["errors"] += 1
         except Exception as e:
             print(f"    ❌ Erreur: {e}")
             self.stats["errors"] += 1
-        
-        return documents
-    
-    def scrape_all_sites(self):
-        """Scrape tous les sites configurés"""
-        print("🚀 Démarrage du web scraping...\n")
-        
+
+        return []
+
+    async def _fetch_and_parse(self, session, url: str, category: str, sem: asyncio.Semaphore) -> List[Dict]:
+        """Télécharge une URL (sous sémaphore par hôte) puis la parse"""
+        if url in self.visited_urls:
+            print(f"  ⏭️  Déjà visité: {url}")
+            return []
+
+        async with sem:
+            try:
+                print(f"  🌐 Scraping: {url}")
+                async with session.get(
+                    url,
+                    headers=self._request_headers(url),
+                    timeout=aiohttp.ClientTimeout(total=10)
+                ) as response:
+                    # GET conditionnel : 304 = page inchangée, rien à
+                    # télécharger ni à reparser
+                    if response.status == 304:
+                        self._skip_unchanged(url)
+                        return []
+                    response.raise_for_status()
+                    html = await response.read()
+                    self._record_validators(url, response.headers)
+            except Exception as e:
+                print(f"    ❌ Erreur réseau: {e}")
+                self.stats["errors"] += 1
+                return []
+            # Politesse par hôte : le délai est tenu sous le sémaphore,
+            # les autres hôtes continuent en parallèle
+            await asyncio.sleep(2)
+
+        try:
+            return self._parse_page(url, category, html)
+        except Exception as e:
+            print(f"    ❌ Erreur: {e}")
+            self.stats["errors"] += 1
+            return []
+
+    async def _scrape_all_async(self):
+        """Scrape toutes les URLs en parallèle (2 connexions max par hôte)"""
+        host_sems = {}
+        tasks = []
+
+        async with aiohttp.ClientSession() as session:
+            for site in self.target_sites:
+                print(f"📚 Scraping: {site['name']}")
+                print(f"   Catégorie: {site['category']}")
+
+                for url in site['urls']:
+                    host = urlparse(url).netloc
+                    sem = host_sems.setdefault(host, asyncio.Semaphore(2))
+                    tasks.append(self._fetch_and_parse(session, url, site['category'], sem))
+
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Assigner les IDs dans l'ordre des URLs configurées
         doc_id = 1
-        
+        for docs in results:
+            if isinstance(docs, BaseException):
+                print(f"    ❌ Erreur: {docs}")
+                self.stats["errors"] += 1
+                continue
+            for doc in docs:
+                doc['id'] = doc_id
+                doc_id += 1
+            self.scraped_data.extend(docs)
+
+    def _is_near_duplicate(self, fingerprint: int) -> bool:
+        """Vrai si une empreinte connue est à distance de Hamming ≤ 3"""
+        for seen in self.seen_hashes:
+            if bin(fingerprint ^ seen).count('1') <= 3:
+                return True
+        return False
+
+    def _save_seen_hashes(self):
+        """Persiste les empreintes de dédoublonnage (best effort)"""
+        try:
+            _dump_json(sorted(self.seen_hashes), self.output_dir / "seen_hashes.json")
+        except Exception as e:
+            print(f"⚠️  Empreintes de dédoublonnage non sauvegardées: {e}")
+
+    def _request_headers(self, url: str) -> Dict[str, str]:
+        """Headers de requête, avec les validateurs conditionnels de l'URL"""
+        meta = self.scrape_meta.get(url)
+        if not meta:
+            return self.headers
+        headers = dict(self.headers)
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def _record_validators(self, url: str, response_headers):
+        """Mémorise les validateurs (ETag / Last-Modified) d'une réponse"""
+        etag = response_headers.get('ETag', '')
+        last_modified = response_headers.get('Last-Modified', '')
+        if etag or last_modified:
+            self.scrape_meta[url] = {'etag': etag, 'last_modified': last_modified}
+
+    def _skip_unchanged(self, url: str):
+        """Comptabilise une page inchangée (réponse 304)"""
+        print(f"    ⏭️  Page inchangée (304): {url}")
+        self.stats["pages_unchanged"] += 1
+        self.visited_urls.add(url)
+
+    def _save_scrape_meta(self):
+        """Persiste les validateurs HTTP par URL (best effort)"""
+        try:
+            _dump_json(self.scrape_meta, self.output_dir / "scrape_meta.json")
+        except Exception as e:
+            print(f"⚠️  Validateurs HTTP non sauvegardés: {e}")
+
+    def _fetch_sync(self, url: str, host_locks: Dict[str, threading.Lock]) -> Optional[bytes]:
+        """
+        Télécharge une URL (un seul téléchargement à la fois par hôte).
+
+        Returns:
+            bytes: Le HTML, ou None si la page est inchangée (304)
+        """
+        with host_locks[urlparse(url).netloc]:
+            print(f"  🌐 Scraping: {url}")
+            response = requests.get(url, headers=self._request_headers(url), timeout=10)
+            # Politesse par hôte : le délai est tenu sous le verrou
+            time.sleep(2)
+        if response.status_code == 304:
+            self._skip_unchanged(url)
+            return None
+        response.raise_for_status()
+        self._record_validators(url, response.headers)
+        return response.content
+
+    def _scrape_all_threaded(self):
+        """
+        Scrape sans aiohttp : les téléchargements partent dans un pool de
+        threads pendant que le thread principal parse les pages reçues —
+        l'attente réseau de l'URL N+1 recouvre le parsing de l'URL N.
+        """
+        url_cat = []
         for site in self.target_sites:
             print(f"📚 Scraping: {site['name']}")
             print(f"   Catégorie: {site['category']}")
-            
-            for url in site['urls']:
-                docs = self.extract_text_from_url(url, site['category'])
-                
-                # Ajouter les IDs
-                for doc in docs:
-                    doc['id'] = doc_id
-                    doc_id += 1
-                
-                self.scraped_data.extend(docs)
-                
-                # Respecter les délais entre requêtes
-                time.sleep(2)
-            
-            print()
-        
-        print("✅ Scraping terminé!\n")
+            url_cat.extend((url, site['category']) for url in site['urls'])
+
+        host_locks = {
+            urlparse(url).netloc: threading.Lock()
+            for url, _ in url_cat
+        }
+
+        parsed = {}
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {
+                executor.submit(self._fetch_sync, url, host_locks): (url, category)
+                for url, category in url_cat
+                if url not in self.visited_urls
+            }
+
+            for future in as_completed(futures):
+                url, category = futures[future]
+                try:
+                    html = future.result()
+                except Exception as e:
+                    print(f"    ❌ Erreur réseau: {e}")
+                    self.stats["errors"] += 1
+                    continue
+                if html is None:  # Page inchangée (304)
+                    continue
+                try:
+                    parsed[url] = self._parse_page(url, category, html)
+                except Exception as e:
+                    print(f"    ❌ Erreur: {e}")
+                    self.stats["errors"] += 1
+
+        # Assigner les IDs dans l'ordre des URLs configurées
+        doc_id = 1
+        for url, _ in url_cat:
+            for doc in parsed.get(url, []):
+                doc['id'] = doc_id
+                doc_id += 1
+                self.scraped_data.append(doc)
+
+    def scrape_all_sites(self):
+        """Scrape tous les sites configurés"""
+        print("🚀 Démarrage du web scraping...\n")
+
+        if aiohttp is not None:
+            # Les attentes réseau des hôtes indépendants se recouvrent :
+            # le temps total passe de la somme des latences à leur max
+            asyncio.run(self._scrape_all_async())
+        else:
+            self._scrape_all_threaded()
+
+        self._save_seen_hashes()
+        self._save_scrape_meta()
+
+        print("\n✅ Scraping terminé!\n")
     
     def save_scraped_data(self):
         """Sauvegarde les données scrapées"""
         output_path = self.output_dir / "scraped_data.json"
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(self.scraped_data, f, ensure_ascii=False, indent=2)
-        
+
+        _dump_json(self.scraped_data, output_path)
+
         print(f"💾 Données sauvegardées: {output_path}")
         print(f"   📊 {len(self.scraped_data)} documents créés")
     
+    def _corpus_meta(self, corpus_path: Path, meta_path: Path) -> tuple:
+        """
+        Retourne (max_id, nombre de documents) du corpus JSONL.
+
+        Lit le sidecar .meta.json s'il est présent, sinon fait un scan
+        unique du fichier (et le sidecar est recréé après la fusion).
+
+        Le sidecar n'est cru que s'il est au moins aussi récent que le
+        corpus : prepare_data_csv réécrit corpus.jsonl de zéro (IDs
+        repartant à 1) sans le toucher, et un sidecar périmé gonflerait
+        max_id et le décompte.
+        """
+        if meta_path.exists():
+            try:
+                if (not corpus_path.exists()
+                        or meta_path.stat().st_mtime >= corpus_path.stat().st_mtime):
+                    meta = _load_json(meta_path)
+                    return int(meta["max_id"]), int(meta["count"])
+            except Exception:
+                pass
+
+        max_id = 0
+        count = 0
+        if corpus_path.exists():
+            loads = orjson.loads if orjson is not None else json.loads
+            with open(corpus_path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    doc = loads(line)
+                    count += 1
+                    doc_id = doc.get('id', 0)
+                    if isinstance(doc_id, int) and doc_id > max_id:
+                        max_id = doc_id
+        return max_id, count
+
     def merge_with_corpus(self):
-        """Fusionne les données scrapées avec le corpus existant"""
-        corpus_path = self.output_dir / "corpus.json"
-        
-        if not corpus_path.exists():
-            print("⚠️  Aucun corpus existant trouvé. Les données scrapées seront le nouveau corpus.")
-            existing_corpus = []
+        """
+        Ajoute les données scrapées au corpus JSONL.
+
+        Le corpus est stocké en JSON Lines : les nouveaux documents sont
+        ajoutés en fin de fichier en O(nouveaux), sans relire ni
+        réécrire les documents existants. L'ancien format liste
+        (corpus.json) est migré une seule fois.
+        """
+        corpus_path = self.output_dir / "corpus.jsonl"
+        meta_path = self.output_dir / "corpus.meta.json"
+        legacy_path = self.output_dir / "corpus.json"
+
+        # Migration unique de l'ancien format liste vers JSONL
+        if not corpus_path.exists() and legacy_path.exists():
+            legacy_corpus = _load_json(legacy_path)
+            with open(corpus_path, 'wb') as f:
+                for doc in legacy_corpus:
+                    f.write(_dumps_line(doc))
+            print(f"🔁 Corpus migré vers JSONL: {len(legacy_corpus)} documents")
+
+        max_id, existing_count = self._corpus_meta(corpus_path, meta_path)
+        if existing_count:
+            print(f"📖 Corpus existant: {existing_count} documents")
         else:
-            with open(corpus_path, 'r', encoding='utf-8') as f:
-                existing_corpus = json.load(f)
-            print(f"📖 Corpus existant: {len(existing_corpus)} documents")
-        
-        # Trouver le dernier ID
-        max_id = max([doc.get('id', 0) for doc in existing_corpus], default=0)
-        
+            print("⚠️  Aucun corpus existant trouvé. Les données scrapées seront le nouveau corpus.")
+
         # Réassigner les IDs aux nouvelles données
         for i, doc in enumerate(self.scraped_data, start=1):
             doc['id'] = max_id + i
-        
-        # Fusionner
-        merged_corpus = existing_corpus + self.scraped_data
-        
-        # Sauvegarder le corpus fusionné
-        with open(corpus_path, 'w', encoding='utf-8') as f:
-            json.dump(merged_corpus, f, ensure_ascii=False, indent=2)
-        
+
+        # Append en fin de fichier : seuls les nouveaux octets sont écrits
+        with open(corpus_path, 'ab') as f:
+            for doc in self.scraped_data:
+                f.write(_dumps_line(doc))
+
+        total = existing_count + len(self.scraped_data)
+        _dump_json(
+            {"max_id": max_id + len(self.scraped_data), "count": total},
+            meta_path
+        )
+
         print(f"\n💾 Corpus fusionné sauvegardé: {corpus_path}")
-        print(f"   📊 Total: {len(merged_corpus)} documents")
+        print(f"   📊 Total: {total} documents")
         print(f"   ➕ Ajoutés: {len(self.scraped_data)} nouveaux documents")
     
     def print_statistics(self):
@@ -239,6 +583,8 @@ class WebScraper:
         print(f"Paragraphes extraits: {self.stats['total_paragraphs']}")
         print(f"Documents créés:     {len(self.scraped_data)}")
         print(f"Mots totaux:         {self.stats['total_words']:,}")
+        print(f"Doublons écartés:    {self.stats['duplicates_skipped']}")
+        print(f"Pages inchangées:    {self.stats['pages_unchanged']}")
         print(f"Erreurs:             {self.stats['errors']}")
         
         if len(self.scraped_data) > 0:
@@ -271,7 +617,7 @@ def main():
     print("🎉 Scraping terminé!")
     print("📁 Fichiers générés/mis à jour:")
     print("   - data/scraped_data.json")
-    print("   - data/corpus.json (fusionné)\n")
+    print("   - data/corpus.jsonl (fusionné)\n")
     
     print("⚠️  Note: Respectez toujours les conditions d'utilisation")
     print("   des sites web et le fichier robots.txt!\n")